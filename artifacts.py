@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+artifacts.py — precompress the published files.
+
+The last build stage. The artifacts (docs/index.html, output/rates.json)
+are already written minified by their stages; each is written as .gz and,
+when the optional brotli module is installed, .br at maximum compression,
+so a static server can hand out the precompressed file with no CPU cost per
+request.
+
+output/artifacts.json records every artifact's size and sha256 and the size
+and ratio of each compressed variant. An artifact whose content hash
+matches the manifest, and whose variants are all on disk, is not
+recompressed.
+
+    python3 artifacts.py      # after a build; build.py runs it itself
+"""
+
+import gzip
+import hashlib
+import json
+import os
+
+import generate_json
+import html_rates
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST = "artifacts.json"  # in generate_json.OUTPUT_DIR
+
+
+def default_artifacts():
+    """The page and rates.json, wherever their stages are set to write them."""
+    return [html_rates.OUTPUT_HTML, generate_json.RATES_JSON]
+
+
+def manifest_file():
+    return os.path.join(generate_json.OUTPUT_DIR, MANIFEST)
+
+def compressors():
+    """(suffix, compress) for every variant that can be written here."""
+    variants = [(".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", lambda data: brotli.compress(data, quality=11)))
+    return variants
+
+
+def load_manifest(path=None):
+    try:
+        with open(path or manifest_file()) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_atomic(path, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def publish(artifacts=None, manifest_path=None):
+    """Precompress every artifact (default_artifacts()); returns the new
+    manifest."""
+    artifacts = artifacts or default_artifacts()
+    manifest_path = manifest_path or manifest_file()
+    old = load_manifest(manifest_path)
+    manifest = {}
+    for path in artifacts:
+        with open(path, "rb") as f:
+            data = f.read()
+
+        digest = hashlib.sha256(data).hexdigest()
+        previous = old.get(path, {})
+        entry = {"bytes": len(data), "sha256": digest}
+        for suffix, compress in compressors():
+            known = previous.get(suffix.lstrip("."))
+            if previous.get("sha256") == digest and known and os.path.exists(path + suffix):
+                entry[suffix.lstrip(".")] = known
+                continue
+            packed = compress(data)
+            write_atomic(path + suffix, packed)
+            entry[suffix.lstrip(".")] = {"bytes": len(packed), "ratio": round(len(packed) / len(data), 4)}
+        manifest[path] = entry
+
+    tmp = f"{manifest_path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, manifest_path)
+    return manifest
+
+
+def main():
+    for path, entry in publish().items():
+        variants = ", ".join(f"{k} {v['bytes']:,} B ({v['ratio']:.0%})"
+                             for k, v in entry.items() if isinstance(v, dict))
+        print(f"{path}: {entry['bytes']:,} B; {variants}")
+    if brotli is None:
+        print("brotli not installed; skipped .br variants")
+
+
+if __name__ == "__main__":
+    main()
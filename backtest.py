@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+backtest.py — flat vs TOU savings over a fleet of household meter files.
+
+Each meter file is an interval-usage CSV (Timestamp, kWh — see bills.py).
+Rates come from csv_rates.build_tables(), flattened once into a dense
+table: for every class and day, the flat total and each TOU period's total
+(¢/kWh). Together with the TOU hour-of-year period codes (tou_schedule.py)
+it is placed in one shared-memory block. Worker processes attach to that
+block by name and read it through memoryviews, so the tables are never
+copied or pickled per worker; only file names go out and small per-household
+results come back.
+
+Each worker streams its file row by row, so memory stays flat however
+large a household's history is.
+
+    python3 backtest.py meters/ --class RS --out households.csv
+    python3 backtest.py a.csv b.csv --classes-csv classes.csv   # File, Class
+
+Per-household results are written as CSV; the aggregate is printed.
+"""
+
+import argparse
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import bills
+import csv_rates
+from tou_schedule import NO_PERIOD, TouSchedule
+
+HOURS_PER_YEAR = 8784  # leap-year size, so every year's codes share a stride
+NAN = float("nan")
+
+# Set in each worker by attach().
+_shm = None
+_table = None
+
+
+class RateTable:
+    """Layout of the shared block: rates as doubles, then period codes.
+
+    rates[((class * days) + day) * slots + slot], slot 0 = flat, 1 + code =
+    TOU period code; codes[(year * len(classes) + class) * HOURS_PER_YEAR + hour].
+    """
+
+    def __init__(self, classes, start, days, first_year, years, slots):
+        self.classes = classes
+        self.start = start
+        self.days = days
+        self.first_year = first_year
+        self.years = years
+        self.slots = slots
+
+    @property
+    def rate_bytes(self):
+        return len(self.classes) * self.days * self.slots * 8
+
+    @property
+    def size(self):
+        return self.rate_bytes + self.years * len(self.classes) * HOURS_PER_YEAR
+
+    def views(self, buf):
+        return buf[:self.rate_bytes].cast("d"), buf[self.rate_bytes:self.size]
+
+
+def build_shared_table(as_of_today, classes):
+    """Fill a new shared-memory block with the daily rate table; returns
+    (shared memory, layout). The caller owns and must unlink the block."""
+    flat_rows, tou_rows = csv_rates.build_tables(as_of_today)
+    timeline = bills.RateTimeline(flat_rows, tou_rows)
+    schedule = TouSchedule.load()
+
+    all_dates = [r[0] for r in flat_rows] + [r[0] for r in tou_rows]
+    start = min(all_dates, default=as_of_today)
+    days = (as_of_today - start).days + 1
+    layout = RateTable(classes, start.toordinal(), days, start.year,
+                       as_of_today.year - start.year + 1, 1 + len(schedule.periods))
+
+    shm = shared_memory.SharedMemory(create=True, size=layout.size)
+    rates, codes = layout.views(shm.buf)
+    for c, cls in enumerate(classes):
+        for d in range(days):
+            day = start + timedelta(days=d)
+            base = (c * days + d) * layout.slots
+            flat = timeline.flat_on(cls, day)
+            rates[base] = NAN if flat is None else flat[3]
+            for p, period in enumerate(schedule.periods):
+                tou = timeline.tou_on(cls, period, day)
+                rates[base + 1 + p] = NAN if tou is None else tou[3]
+        for y in range(layout.years):
+            table = schedule.hour_table(start.year + y, cls)
+            offset = (y * len(classes) + c) * HOURS_PER_YEAR
+            codes[offset:offset + len(table)] = table
+    del rates, codes
+    return shm, layout
+
+
+def attach(name, layout):
+    """Worker initializer: map the shared block without copying it."""
+    global _shm, _table
+    _shm = shared_memory.SharedMemory(name=name)
+    _table = (layout, *layout.views(_shm.buf))
+
+
+def price_meter(path, cls):
+    """Flat and TOU cost (cents) of one meter file, streamed."""
+    layout, rates, codes = _table
+    c = layout.classes.index(cls)
+    class_base = c * layout.days
+    ncls = len(layout.classes)
+    flat = tou = kwh_total = unpriced = 0.0
+    day_cache = {}
+
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        ts_col, kwh_col = header.index(bills.USAGE_TIMESTAMP), header.index(bills.USAGE_KWH)
+        for row in reader:
+            ts = row[ts_col]
+            kwh = float(row[kwh_col])
+            kwh_total += kwh
+            day_key = ts[:10]
+            cached = day_cache.get(day_key)
+            if cached is None:
+                day = date.fromisoformat(day_key)
+                d = day.toordinal() - layout.start
+                y = day.year - layout.first_year
+                if not (0 <= d < layout.days and 0 <= y < layout.years):
+                    cached = day_cache[day_key] = (-1, 0)
+                else:
+                    cached = day_cache[day_key] = (
+                        (class_base + d) * layout.slots,
+                        (y * ncls + c) * HOURS_PER_YEAR + (day.timetuple().tm_yday - 1) * 24,
+                    )
+            base, hour_base = cached
+            if base < 0:
+                unpriced += kwh
+                continue
+            flat_rate = rates[base]
+            code = codes[hour_base + int(ts[11:13])]
+            tou_rate = NAN if code == NO_PERIOD else rates[base + 1 + code]
+            if flat_rate != flat_rate or tou_rate != tou_rate:
+                unpriced += kwh  # compare like for like: both plans must be priced
+                continue
+            flat += kwh * flat_rate
+            tou += kwh * tou_rate
+
+    return {"household": Path(path).stem, "class": cls, "kwh": kwh_total,
+            "flat": flat, "tou": tou, "savings": flat - tou, "unpriced_kwh": unpriced}
+
+
+def _price(job):
+    return price_meter(*job)
+
+
+def meter_files(paths):
+    for p in map(Path, paths):
+        if p.is_dir():
+            yield from sorted(p.glob("*.csv"))
+        else:
+            yield p
+
+
+def run(jobs, as_of_today, workers=None):
+    """Price (path, class) jobs across a process pool; returns per-household results."""
+    classes = sorted({cls for _, cls in jobs})
+    shm, layout = build_shared_table(as_of_today, classes)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=attach,
+                                 initargs=(shm.name, layout)) as pool:
+            chunksize = max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 4))
+            return list(pool.map(_price, [(str(p), cls) for p, cls in jobs], chunksize=chunksize))
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flat vs TOU backtest over many meter files.")
+    parser.add_argument("paths", nargs="+", help="meter CSVs, or directories of them")
+    parser.add_argument("--class", dest="cls", default="RS", choices=csv_rates.CLASSES)
+    parser.add_argument("--classes-csv", help="CSV mapping File (stem or name) to Class")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--out", default="backtest.csv", help="per-household results CSV")
+    args = parser.parse_args()
+
+    overrides = {}
+    if args.classes_csv:
+        with open(args.classes_csv, newline="") as f:
+            overrides = {Path(r["File"]).stem: r["Class"] for r in csv.DictReader(f)}
+    jobs = [(p, overrides.get(p.stem, args.cls)) for p in meter_files(args.paths)]
+
+    results = run(jobs, args.as_of, args.workers)
+
+    with open(args.out, "w", newline="") as f:
+        w = csv.writer(f, lineterminator="\n")
+        w.writerow(["Household", "Class", "kWh", "Flat Cost", "TOU Cost", "TOU Savings", "Unpriced kWh"])
+        for r in results:
+            w.writerow([r["household"], r["class"], round(r["kwh"], 3), round(r["flat"] / 100, 2),
+                        round(r["tou"] / 100, 2), round(r["savings"] / 100, 2), round(r["unpriced_kwh"], 3)])
+
+    flat = sum(r["flat"] for r in results)
+    tou = sum(r["tou"] for r in results)
+    savers = sum(1 for r in results if r["savings"] > 0)
+    print(f"{len(results)} households, {sum(r['kwh'] for r in results):,.0f} kWh")
+    print(f"  flat ${flat / 100:,.2f}   TOU ${tou / 100:,.2f}   TOU saves ${(flat - tou) / 100:+,.2f}")
+    print(f"  {savers} of {len(results)} households would save on TOU")
+    print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
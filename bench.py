@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+bench.py — time and measure peak memory of each build stage on synthetic
+tariff histories (see synth_tariffs.py).
+
+    python3 bench.py                          # small + medium scales
+    python3 bench.py --scales large --save results.json
+    python3 bench.py --compare results.json   # exit 1 on a slowdown
+
+Each stage is timed as the best of --repeat runs, then run once more under
+tracemalloc for its peak allocation. Results are written as JSON so two runs
+can be compared; --compare fails when any stage is more than --threshold
+times slower than the saved run (ignoring differences under --min-delta
+seconds, which are noise).
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+from pathlib import Path
+
+import csv_rates
+import generate_json
+import html_rates
+import synth_tariffs
+import tariffs
+
+SCALES = {
+    "small": {"years": 5, "classes": 3, "periods": 3},
+    "medium": {"years": 20, "classes": 12, "periods": 4},
+    "large": {"years": 40, "classes": 36, "periods": 6},
+}
+
+
+# synth_tariffs' season names, on the default calendar
+SEASONS = [["05-01", "Summer"], ["11-01", "Winter"]]
+
+
+def tariff(data_dir, output_dir, meta):
+    """A tariffs.json entry for a synthetic data set."""
+    return {"data": str(data_dir), "output": str(output_dir), "classes": meta["classes"],
+            "periods": meta["periods"], "seasons": SEASONS}
+
+
+def stages(as_of_today, output_dir):
+    """(name, callable) pairs; each callable takes the previous stage results."""
+    def records(ctx):
+        """The tables as records in output order."""
+        return csv_rates.sort_flat(ctx["build_tables"][0]), csv_rates.sort_tou(ctx["build_tables"][1])
+
+    def html(ctx):
+        flat, tou = ctx["records"]
+        html_rates.write_html(html_rates.group_rates(flat), html_rates.group_rates(tou), output_dir / "index.html")
+
+    return [
+        ("load_components", lambda ctx: csv_rates.load_components()),
+        ("build_tables", lambda ctx: csv_rates.build_tables(as_of_today, components=ctx["load_components"])),
+        ("sweep_tables", lambda ctx: csv_rates.sweep_tables(as_of_today, components=ctx["load_components"])),
+        ("records", records),
+        ("write_output", lambda ctx: csv_rates.write_output(*ctx["records"])),
+        ("generate_json", lambda ctx: generate_json.write_json(*ctx["records"], output_dir / "rates.json")),
+        ("generate_api", lambda ctx: generate_json.write_api(generate_json.build_data(*ctx["records"]),
+                                                             output_dir / "api")),
+        ("generate_html", html),
+    ]
+
+
+def run_scale(params, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        meta = synth_tariffs.generate(tmp / "data", **params)
+        output_dir = tmp / "output"
+        output_dir.mkdir()
+        tariffs.configure(tariff(tmp / "data", output_dir, meta))
+        as_of_today = date.fromisoformat(meta["end"])
+
+        results = {}
+        ctx = {}
+        with contextlib.redirect_stdout(io.StringIO()):
+            for name, stage in stages(as_of_today, output_dir):
+                best = float("inf")
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    ctx[name] = stage(ctx)
+                    best = min(best, time.perf_counter() - start)
+
+                tracemalloc.start()
+                stage(ctx)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                results[name] = {"seconds": round(best, 6), "peak_kib": round(peak / 1024, 1)}
+
+        flat_rows, tou_rows = ctx["build_tables"]
+        return {"params": params, "flat_rows": len(flat_rows), "tou_rows": len(tou_rows), "stages": results}
+
+
+def compare(results, baseline, threshold, min_delta):
+    """Stages slower than threshold x baseline, as printable lines."""
+    regressions = []
+    for scale, current in results["scales"].items():
+        previous = baseline.get("scales", {}).get(scale)
+        if previous is None:
+            continue
+        for stage, now in current["stages"].items():
+            before = previous["stages"].get(stage)
+            if before is None:
+                continue
+            delta = now["seconds"] - before["seconds"]
+            if delta > min_delta and now["seconds"] > threshold * before["seconds"]:
+                regressions.append(f"{scale}/{stage}: {before['seconds']:.4f}s -> {now['seconds']:.4f}s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the rate build stages.")
+    parser.add_argument("--scales", nargs="+", default=["small", "medium"], choices=sorted(SCALES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", help="write results JSON here")
+    parser.add_argument("--compare", help="results JSON from an earlier run")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    parser.add_argument("--min-delta", type=float, default=0.005)
+    args = parser.parse_args()
+
+    results = {"python": sys.version.split()[0], "scales": {}}
+    for scale in args.scales:
+        result = results["scales"][scale] = run_scale(SCALES[scale], args.repeat)
+        print(f"{scale}: {result['flat_rows']} flat rows, {result['tou_rows']} TOU rows")
+        for stage, r in result["stages"].items():
+            print(f"  {stage:16} {r['seconds'] * 1000:10.2f} ms  {r['peak_kib']:10.1f} KiB peak")
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, indent=2))
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare(results, baseline, args.threshold, args.min_delta)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
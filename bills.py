@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+bills.py — price interval-meter (AMI) usage against the rate tables.
+
+Usage files are CSVs with one row per interval (15-minute or hourly):
+
+    Timestamp, kWh
+    2025-07-01 13:15, 0.42
+
+Timestamps are local interval-start times in ISO form ("T" or space
+separator). Rows are streamed once and folded into kWh per (day, hour), so
+memory is bounded by the hours covered, not the number of intervals. Rates
+are then looked up once per day — a binary search over each class's sorted
+effective dates from csv_rates.build_tables() — and applied to the
+aggregates, giving flat and TOU totals split into Distribution, Supply and
+Transmission.
+
+All amounts are in cents, like the rates themselves.
+"""
+
+import argparse
+import csv
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date
+
+import csv_rates
+from tou_schedule import TouSchedule
+
+USAGE_TIMESTAMP = "Timestamp"
+USAGE_KWH = "kWh"
+
+COMPONENTS = ["Distribution", "Supply", "Transmission"]
+
+
+class RateTimeline:
+    """Flat and TOU rows from build_tables(), per class (and period), as
+    sorted effective-date arrays for as-of lookups by day."""
+
+    def __init__(self, flat_rows, tou_rows):
+        self.flat = self._index(flat_rows, lambda r: r[1])
+        self.tou = self._index(tou_rows, lambda r: (r[1], r[3]))
+
+    @staticmethod
+    def _index(rows, key):
+        series = defaultdict(list)
+        for r in rows:
+            series[key(r)].append(r)
+        index = {}
+        for k, group in series.items():
+            group.sort(key=lambda r: r[0])
+            index[k] = ([r[0] for r in group], group)
+        return index
+
+    @staticmethod
+    def _as_of(series, day):
+        if series is None:
+            return None
+        dates, rows = series
+        i = bisect_right(dates, day)
+        return rows[i - 1] if i else None
+
+    def flat_on(self, cls, day):
+        """(distribution, supply, transmission, total) in effect on day, or None."""
+        row = self._as_of(self.flat.get(cls), day)
+        return None if row is None else row[3:7]
+
+    def tou_on(self, cls, period, day):
+        row = self._as_of(self.tou.get((cls, period)), day)
+        return None if row is None else row[4:8]
+
+
+def hourly_usage(rows):
+    """Fold (timestamp, kWh) rows into {(day, hour): kWh}."""
+    usage = defaultdict(float)
+    for ts, kwh in rows:
+        usage[(ts[:10], int(ts[11:13]))] += float(kwh)
+    return usage
+
+
+def read_usage(path):
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        return hourly_usage((r[USAGE_TIMESTAMP], r[USAGE_KWH]) for r in reader)
+
+
+def usage_by_day(usage, period_for_hour):
+    """{day: {period: kWh}} from hourly usage."""
+    days = defaultdict(lambda: defaultdict(float))
+    parsed = {}
+    for (day, hour), kwh in usage.items():
+        if day not in parsed:
+            parsed[day] = date.fromisoformat(day)
+        days[day][period_for_hour(parsed[day], hour)] += kwh
+    return days
+
+
+def empty_bill():
+    return {"kWh": 0.0, "unpriced kWh": 0.0, **{c: 0.0 for c in COMPONENTS}, "Total": 0.0}
+
+
+def add_charges(bill, kwh, rates):
+    *components, total = rates
+    bill["kWh"] += kwh
+    for name, rate in zip(COMPONENTS, components):
+        bill[name] += kwh * rate
+    bill["Total"] += kwh * total
+
+
+def price_usage(usage, cls, timeline, period_for_hour=None):
+    """Flat and TOU bills for hourly usage (see hourly_usage) in class cls.
+
+    period_for_hour(day, hour) names the TOU period of an hour; it defaults
+    to the schedule in data/tou_schedule.csv. Usage on days with no rate (or
+    no TOU schedule) in effect is reported as "unpriced kWh" rather than
+    silently dropped.
+    """
+    if period_for_hour is None:
+        period_for_hour = TouSchedule.load().period_for_hour(cls)
+
+    flat = empty_bill()
+    tou = empty_bill()
+    tou["periods"] = {p: empty_bill() for p in csv_rates.TOU_PERIODS}
+
+    for day_str, periods in sorted(usage_by_day(usage, period_for_hour).items()):
+        day = date.fromisoformat(day_str)
+        day_kwh = sum(periods.values())
+
+        flat_rates = timeline.flat_on(cls, day)
+        if flat_rates is None:
+            flat["unpriced kWh"] += day_kwh
+        else:
+            add_charges(flat, day_kwh, flat_rates)
+
+        for period, kwh in periods.items():
+            tou_rates = timeline.tou_on(cls, period, day)
+            if tou_rates is None:
+                tou["unpriced kWh"] += kwh
+                continue
+            add_charges(tou, kwh, tou_rates)
+            add_charges(tou["periods"][period], kwh, tou_rates)
+
+    return {"flat": flat, "tou": tou}
+
+
+def price_file(path, cls, as_of_today=None):
+    """Read a usage CSV and price it against freshly built tables. The tables
+    run through the last usage day so season flips inside the data count."""
+    usage = read_usage(path)
+    if as_of_today is None:
+        as_of_today = max((date.fromisoformat(day) for day, _ in usage), default=date.today())
+    timeline = RateTimeline(*csv_rates.build_tables(as_of_today))
+    return price_usage(usage, cls, timeline)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Price interval usage on flat and TOU rates.")
+    parser.add_argument("usage", help="CSV with Timestamp and kWh columns")
+    parser.add_argument("--class", dest="cls", default="RS", choices=csv_rates.CLASSES)
+    args = parser.parse_args()
+
+    bills = price_file(args.usage, args.cls)
+    for name, bill in bills.items():
+        parts = ", ".join(f"{c} ${bill[c] / 100:,.2f}" for c in COMPONENTS)
+        print(f"{name.upper():4} {bill['kWh']:,.1f} kWh  total ${bill['Total'] / 100:,.2f}  ({parts})")
+        if bill["unpriced kWh"]:
+            print(f"     {bill['unpriced kWh']:,.1f} kWh had no rate in effect")
+    flat_total, tou_total = bills["flat"]["Total"], bills["tou"]["Total"]
+    print(f"TOU vs flat: ${(tou_total - flat_total) / 100:+,.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+build.py — run the whole site build in one process.
+
+The rate tables are computed once by csv_rates.build_tables() and the row
+tuples are handed straight to every output stage:
+
+    output/rates.csv, output/rates_tou.csv   csv_rates.write_output
+    output/rates.json                        generate_json.write_json
+    docs/index.html                          html_rates.write_html
+
+CSV is just one more sink here, not the format the later stages read back.
+The sinks are CPU-bound Python and run one after another. Finally the HTML and
+JSON are precompressed (see artifacts.py) unless --no-compress is given.
+
+By default the tables come from the incremental build cache (see
+build_cache.py); --full ignores the cache and recomputes every date.
+
+--upcoming also publishes rates that are already known to take effect later
+(future-dated filings, season flips); every published rate carries a
+valid_from / valid_until window either way.
+
+--sqlite also updates output/rates.sqlite, the component files and rate
+timelines as SQL tables with as-of indexes (see rates_db.py).
+
+--watch keeps running after the build and rebuilds on every change to
+data/*.csv or a stage module, recomputing only what the change affects (see
+watch.py). It does not write the compressed copies.
+
+--profile writes per-stage timings, allocations and hot-path counters to
+output/profile.json (see profiling.py). --cprofile additionally saves cProfile stats.
+"""
+
+import argparse
+import cProfile
+from datetime import date
+
+import artifacts
+import build_cache
+import csv_rates
+import generate_json
+import html_rates
+import profiling
+import rates_db
+
+
+STAGES = ("csv", "json", "html")
+
+
+def build(as_of_today, full=False, publish_upcoming=False, compress=True):
+    components = csv_rates.load_components()  # parsed once for every table below
+    if full:
+        flat_rows, tou_rows = csv_rates.build_tables(as_of_today, components=components)
+    else:
+        with profiling.stage("incremental_tables"):
+            flat_rows, tou_rows, _ = build_cache.incremental_tables(as_of_today, components=components)
+    upcoming = csv_rates.upcoming_records(as_of_today, components)
+    write_outputs(flat_rows, tou_rows, upcoming, publish_upcoming, compress)
+    return flat_rows, tou_rows
+
+
+def write_outputs(flat_rows, tou_rows, upcoming, publish_upcoming=False, compress=True, stages=STAGES):
+    """Run the requested output stages on already computed tables."""
+    flat_sorted = csv_rates.sort_flat(flat_rows)
+    tou_sorted = csv_rates.sort_tou(tou_rows)
+
+    if "csv" in stages:
+        csv_rates.write_output(flat_sorted, tou_sorted)
+    if "json" in stages:
+        generate_json.write_json(flat_sorted, tou_sorted, api_dir=generate_json.API_DIR,
+                                 upcoming=upcoming, publish_upcoming=publish_upcoming)
+    if "html" in stages:
+        html_rates.write_html(html_rates.group_rates(flat_sorted), html_rates.group_rates(tou_sorted))
+
+    if compress and ("json" in stages or "html" in stages):
+        with profiling.stage("artifacts"):
+            artifacts.publish()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the rate CSV, JSON and HTML outputs.")
+    parser.add_argument("--full", action="store_true", help="ignore the build cache and recompute every date")
+    parser.add_argument("--upcoming", action="store_true",
+                        help="also publish already-known future rates in the JSON outputs")
+    parser.add_argument("--no-compress", action="store_true",
+                        help="skip the .gz/.br variants of the HTML and JSON")
+    parser.add_argument("--sqlite", action="store_true",
+                        help="also update the SQLite export (output/rates.sqlite)")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and rebuild the affected outputs when data/ or a stage module changes")
+    parser.add_argument("--profile", nargs="?", const=str(csv_rates.OUTPUT / "profile.json"), metavar="PATH",
+                        help="write a stage timing / counter report (default output/profile.json)")
+    parser.add_argument("--cprofile", metavar="PATH", help="also save cProfile stats to PATH")
+    args = parser.parse_args()
+
+    if args.watch:
+        import watch  # watch imports this module
+        try:
+            watch.Watcher(args.upcoming).run()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if args.profile or args.cprofile:
+        profiling.enable()
+    profiler = cProfile.Profile() if args.cprofile else None
+    if profiler:
+        profiler.enable()
+
+    flat_rows, tou_rows = build(date.today(), full=args.full, publish_upcoming=args.upcoming,
+                                 compress=not args.no_compress)
+
+    if args.sqlite:
+        with profiling.stage("sqlite"):
+            rates_db.update(date.today())
+
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(args.cprofile)
+    print(f"Wrote {csv_rates.OUTPUT / 'rates.csv'} ({len(flat_rows)} rows)")
+    print(f"Wrote {csv_rates.OUTPUT / 'rates_tou.csv'} ({len(tou_rows)} rows)")
+    print(f"JSON file written to {generate_json.RATES_JSON}")
+    print(f"JSON API written to {generate_json.API_DIR}")
+    print(f"Static HTML generated at {html_rates.OUTPUT_HTML}")
+    if args.sqlite:
+        print(f"Wrote {rates_db.database_file()}")
+    if args.profile:
+        profiling.write_report(args.profile)
+        print(f"Profile written to {args.profile}")
+        profiling.print_report()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,3 @@
 #!/bin/bash
 
-python3 csv_rates.py
-python3 generate_json.py
-python3 html_rates.py 
+python3 build.py
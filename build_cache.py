@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+build_cache.py — incremental rebuilds for the append-only component files.
+
+csv_rates expects a new tariff supplement to be one appended row. This
+module keeps a cache of the last build next to the outputs:
+
+    output/.build_cache.json
+        per data file: size, sha256 and number of rows already processed
+        the as-of date the build ran for, per-class seasonality
+        the computed flat and TOU rows
+
+On the next run each data file is checked against its cached state. If
+every change is a pure append, only timeline dates on or after the earliest
+appended effective date (or the day after the previous as-of date, if time
+has moved on) are recomputed and spliced onto the cached rows. Anything
+else — an edited or deleted row, a change to csv_rates.py or records.py, a
+class becoming seasonal, the as-of date moving backwards — falls back to a
+full rebuild.
+"""
+
+import hashlib
+import json
+import os
+from datetime import date, timedelta
+from pathlib import Path
+
+import csv_rates
+import records
+
+CACHE = ".build_cache.json"  # in csv_rates.OUTPUT, looked up at call time
+CACHE_VERSION = 1
+ENGINE = (csv_rates, records)  # modules whose code produces the cached rows
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_state(path, rows):
+    """(state, bytes) of a data file; rows is its record count as loaded."""
+    data = Path(path).read_bytes()
+    return {"size": len(data), "sha256": sha256(data), "rows": rows}, data
+
+
+def file_states(components):
+    """{file name: file_state()} for load_components() output."""
+    return {name: file_state(csv_rates.DATA / name, len(component))
+            for name, component in zip(csv_rates.COMPONENT_FILES, components)}
+
+
+def engine_hash():
+    """Cached rows are only valid for the code that produced them."""
+    return sha256(b"".join(Path(module.__file__).read_bytes() for module in ENGINE))
+
+
+def appended_rows(old, new, data):
+    """Number of rows appended since old, or None if the file changed in any
+    other way (including a truncated or rewritten last row)."""
+    if new["sha256"] == old["sha256"]:
+        return 0
+    if new["size"] <= old["size"] or sha256(data[:old["size"]]) != old["sha256"]:
+        return None
+    if not data[:old["size"]].endswith(b"\n") and data[old["size"]:old["size"] + 1] not in (b"\n", b"\r"):
+        return None  # the old last row was extended, not followed by a new one
+    return new["rows"] - old["rows"]
+
+
+def cache_file():
+    return csv_rates.OUTPUT / CACHE
+
+
+def load_cache(cache_path=None):
+    cache_path = cache_path or cache_file()
+    try:
+        with open(cache_path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cache.get("version") != CACHE_VERSION:
+        return None
+    return cache
+
+
+def save_cache(cache, cache_path=None):
+    cache_path = Path(cache_path or cache_file())
+    cache_path.parent.mkdir(exist_ok=True)
+    tmp = cache_path.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(cache, f, separators=(",", ":"))
+    os.replace(tmp, cache_path)
+
+
+def encode_rows(rows):
+    return [[r[0].isoformat(), *r[1:]] for r in rows]
+
+
+def decode_rows(rows, record):
+    return [record(date.fromisoformat(r[0]), *r[1:]) for r in rows]
+
+
+def resume_point(cache, files, components, seasonal, as_of_today):
+    """Earliest date that needs recomputing, or None for a full rebuild."""
+    if cache is None or cache["engine"] != engine_hash() or cache["seasonal"] != seasonal:
+        return None
+    previous = date.fromisoformat(cache["as_of"])
+    if as_of_today < previous:
+        return None
+
+    since = previous + timedelta(days=1)
+    for name, component in zip(csv_rates.COMPONENT_FILES, components):
+        state, data = files[name]
+        old = cache["files"].get(name)
+        if old is None:
+            return None
+        appended = appended_rows(old, state, data)
+        if appended is None:
+            return None
+        if appended:
+            since = min(since, min(r.effective_date for r in component.rows[-appended:]))
+    return since
+
+
+def incremental_tables(as_of_today, cache_path=None, components=None):
+    """Same rows as csv_rates.build_tables(as_of_today), recomputing only the
+    dates an append could have changed. Returns (flat_rows, tou_rows, since),
+    where since is None when a full rebuild was needed."""
+    components = components or csv_rates.load_components()
+    files = file_states(components)
+    dist = components[1]
+    seasonal = {cls: csv_rates.is_seasonal(dist, cls) for cls in csv_rates.CLASSES}
+
+    cache = load_cache(cache_path)
+    since = resume_point(cache, files, components, seasonal, as_of_today)
+
+    if since is None:
+        flat_rows, tou_rows = csv_rates.build_tables(as_of_today, components=components)
+    else:
+        new_flat, new_tou = csv_rates.build_tables(as_of_today, since=since, components=components)
+        flat_rows = [r for r in decode_rows(cache["flat"], records.FlatRate) if r[0] < since] + new_flat
+        tou_rows = [r for r in decode_rows(cache["tou"], records.TouRate) if r[0] < since] + new_tou
+
+    save_cache({
+        "version": CACHE_VERSION,
+        "engine": engine_hash(),
+        "as_of": as_of_today.isoformat(),
+        "seasonal": seasonal,
+        "files": {name: state for name, (state, _) in files.items()},
+        "flat": encode_rows(flat_rows),
+        "tou": encode_rows(tou_rows),
+    }, cache_path)
+    return flat_rows, tou_rows, since
@@ -21,6 +21,9 @@ keyed by whatever it genuinely varies on:
     data/supply_tou.csv         Effective Date, Period, Rate
                                  TOU PTC supply charge, varies by period
 
+    (data/tou_schedule.csv says which hours each TOU period covers; it is
+    only needed to price time-stamped usage — see tou_schedule.py.)
+
 At build time, every output row is produced by looking up the most recent
 ("as of") value for each component independently and summing them. Adding
 a new tariff supplement means appending exactly one row to whichever file
@@ -28,119 +31,151 @@ changed — never touching the others.
 
 Writes:
     output/rates.csv   Class, Season, Effective Date, Rate Type, Total, PTC, Distribution
+
+Run directly, rows are generated class by class, newest first, already in
+output order, and written as they are produced; --from/--to/--class/--period
+limit the build to that slice of the history:
+
+    python3 csv_rates.py --class RS --from 2025-01-01 --stdout tou
 """
 
+import argparse
 import csv
-from datetime import date
+import heapq
+import io
+import os
+import sys
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from itertools import groupby
 from pathlib import Path
 
+import profiling
+import records
+from records import FLAT_HEADER, TOU_HEADER, FlatRate, TouRate
+
 DATA = Path("data")
 OUTPUT = Path("output")
 
+COMPONENT_FILES = ["riders.csv", "distribution_base.csv", "transmission.csv", "supply.csv", "supply_tou.csv"]
+
 CLASSES = ["RS", "RH", "RA"]
 TOU_PERIODS = ["Peak", "Off-Peak", "Super Off-Peak"]
 
-
-def load(path):
-    with open(path, newline="") as f:
-        return list(csv.DictReader(f))
-
-
-def parse_date(s):
-    return date.fromisoformat(s.strip())
-
-
-def parse_num(s):
-    return float(s.strip())
+# Season calendar: (month, day, season) each season starts on, in calendar
+# order; the last one runs through the new year.
+SEASONS = [(5, 1, "Summer"), (11, 1, "Winter")]
 
 
+@profiling.timed("load_riders")
 def load_riders():
-    return [
-        {
-            "Effective Date": parse_date(r["Effective Date"]),
-            "Rider 1": parse_num(r["Rider 1"]),
-            "Rider 5": parse_num(r["Rider 5"]),
-            "Rider 15a": parse_num(r["Rider 15a"]),
-            "Rider 10 (%)": parse_num(r["Rider 10 (%)"]),
-            "Rider 22 (%)": parse_num(r["Rider 22 (%)"]),
-        }
-        for r in load(DATA / "riders.csv")
-    ]
+    return records.load_riders(DATA / "riders.csv")
 
 
+@profiling.timed("load_distribution_base")
 def load_distribution_base():
-    return [
-        {
-            "Effective Date": parse_date(r["Effective Date"]),
-            "Class": r["Class"],
-            "Season": r["Season"],
-            "Base Rate": parse_num(r["Base Rate"]),
-        }
-        for r in load(DATA / "distribution_base.csv")
-    ]
+    return records.load_distribution_base(DATA / "distribution_base.csv")
 
 
+@profiling.timed("load_transmission")
 def load_transmission():
-    return [
-        {
-            "Effective Date": parse_date(r["Effective Date"]),
-            "Class": r["Class"],
-            "Transmission": parse_num(r["Transmission"]),
-        }
-        for r in load(DATA / "transmission.csv")
-    ]
+    return records.load_transmission(DATA / "transmission.csv")
 
 
+@profiling.timed("load_supply")
 def load_supply():
-    return [
-        {"Effective Date": parse_date(r["Effective Date"]), "Rate": parse_num(r["Rate"])}
-        for r in load(DATA / "supply.csv")
-    ]
+    return records.load_supply(DATA / "supply.csv")
 
 
+@profiling.timed("load_supply_tou")
 def load_supply_tou():
-    return [
-        {
-            "Effective Date": parse_date(r["Effective Date"]),
-            "Period": r["Period"],
-            "Rate": parse_num(r["Rate"]),
-        }
-        for r in load(DATA / "supply_tou.csv")
-    ]
+    return records.load_supply_tou(DATA / "supply_tou.csv")
 
 
 def as_of(rows, target_date, **filters):
     """Most recent row on or before target_date matching all filters, or None."""
+    if isinstance(rows, RateIndex):
+        return rows.as_of(target_date, **filters)
+    if profiling.ENABLED:
+        profiling.count("as_of_calls")
+        profiling.count("as_of_rows_scanned", len(rows))
     candidates = [
         r for r in rows
-        if r["Effective Date"] <= target_date
-        and all(r[k] == v for k, v in filters.items())
+        if r.effective_date <= target_date
+        and all(getattr(r, k) == v for k, v in filters.items())
     ]
     if not candidates:
         return None
-    return max(candidates, key=lambda r: r["Effective Date"])
+    return max(candidates, key=lambda r: r.effective_date)
+
+
+class RateIndex:
+    """Point-in-time index over one component file.
+
+    Rows are grouped by their filter fields (e.g. cls + season) and each group
+    is kept as a sorted array of effective dates, so an "as of" lookup is a
+    binary search instead of a scan over the whole file. Iterating the index
+    yields the original rows, so it can stand in for the row list anywhere.
+    """
+
+    def __init__(self, rows, *keys):
+        self.rows = rows
+        self.keys = keys
+        groups = {}
+        for r in rows:
+            groups.setdefault(tuple(getattr(r, k) for k in keys), []).append(r)
+        self.groups = {}
+        for key, group in groups.items():
+            group.sort(key=lambda r: r.effective_date)  # stable: file order kept on ties
+            self.groups[key] = ([r.effective_date for r in group], group)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def as_of(self, target_date, **filters):
+        if set(filters) != set(self.keys):
+            return as_of(self.rows, target_date, **filters)
+        if profiling.ENABLED:
+            profiling.count("as_of_calls")
+            profiling.count("as_of_index_lookups")
+        group = self.groups.get(tuple(filters[k] for k in self.keys))
+        if group is None:
+            return None
+        dates, group_rows = group
+        i = bisect_right(dates, target_date)
+        if i == 0:
+            return None
+        # Same tie-break as max(): the first row in file order for that date.
+        return group_rows[bisect_left(dates, dates[i - 1])]
 
 
 def distribution_total(dist, riders, target_date, cls, season):
-    base_row = as_of(dist, target_date, Class=cls, Season=season)
+    base_row = as_of(dist, target_date, cls=cls, season=season)
     rider_row = as_of(riders, target_date)
     if base_row is None or rider_row is None:
         return None
+    return compound_distribution(base_row, rider_row)
+
 
+def compound_distribution(base_row, rider_row):
+    """Base rate plus riders, with Rider 22 and Rider 10 compounded on top."""
     # 1. Base distribution subtotal
     subtotal = (
-        base_row["Base Rate"]
-        + rider_row["Rider 1"]
-        + rider_row["Rider 5"]
-        + rider_row["Rider 15a"]
+        base_row.base_rate
+        + rider_row.rider_1
+        + rider_row.rider_5
+        + rider_row.rider_15a
     )
 
     # 2. Apply DSIC (Rider 22) to the subtotal
     # (Dividing by 100 because the CSV stores it as 2.17 instead of 0.0217)
-    with_dsic = subtotal * (1 + rider_row["Rider 22 (%)"] / 100)
+    with_dsic = subtotal * (1 + rider_row.rider_22 / 100)
 
     # 3. Apply STAS (Rider 10) on top of the DSIC-inflated total
-    final_total = with_dsic * (1 + rider_row["Rider 10 (%)"] / 100)
+    final_total = with_dsic * (1 + rider_row.rider_10 / 100)
 
     return final_total
 
@@ -148,28 +183,34 @@ def distribution_total(dist, riders, target_date, cls, season):
 def flat_components(supply, trans, target_date, cls):
     """Returns (supply_rate, transmission_rate) or None if not yet in effect."""
     supply_row = as_of(supply, target_date)
-    trans_row = as_of(trans, target_date, Class=cls)
+    trans_row = as_of(trans, target_date, cls=cls)
     if supply_row is None or trans_row is None:
         return None
-    return supply_row["Rate"], trans_row["Transmission"]
+    return supply_row.rate, trans_row.transmission
 
 
 def tou_components(supply_tou, trans, target_date, cls, period):
     """Returns (supply_rate, transmission_rate) or None if not yet in effect."""
-    supply_row = as_of(supply_tou, target_date, Period=period)
-    trans_row = as_of(trans, target_date, Class=cls)
+    supply_row = as_of(supply_tou, target_date, period=period)
+    trans_row = as_of(trans, target_date, cls=cls)
     if supply_row is None or trans_row is None:
         return None
-    return supply_row["Rate"], trans_row["Transmission"]
+    return supply_row.rate, trans_row.transmission
 
 
 def get_season(target_date):
-    """Season is a fixed calendar rule, not a filed tariff value."""
-    return "Summer" if 5 <= target_date.month <= 10 else "Winter"
+    """Season is a fixed calendar rule (SEASONS), not a filed tariff value."""
+    key = (target_date.month, target_date.day)
+    season = SEASONS[-1][2]
+    for month, day, name in SEASONS:
+        if (month, day) > key:
+            break
+        season = name
+    return season
 
 
 def seasons_for_class(dist, cls):
-    return {r["Season"] for r in dist if r["Class"] == cls}
+    return {r.season for r in dist if r.cls == cls}
 
 
 def is_seasonal(dist, cls):
@@ -177,39 +218,88 @@ def is_seasonal(dist, cls):
 
 
 def season_transition_dates(start_year, end_year):
-    """Every May 1 / Nov 1 in range — the dates Distribution can change on
-    for seasonal classes even with no new tariff filing."""
+    """Every season start (May 1 / Nov 1 by default) in range — the dates
+    Distribution can change on for seasonal classes even with no new tariff
+    filing."""
     dates = set()
     for year in range(start_year, end_year + 1):
-        dates.add(date(year, 5, 1))
-        dates.add(date(year, 11, 1))
+        for month, day, _ in SEASONS:
+            dates.add(date(year, month, day))
     return dates
 
 
+@profiling.timed("timeline_for")
 def timeline_for(dist, riders, trans, supply, supply_tou, cls, as_of_today):
     """Union of every date any relevant component changed for this class,
     plus calendar season-transition dates if the class has seasonal rates.
     Never projects past as_of_today — a season flip that hasn't happened
     yet shouldn't appear until the day it actually occurs."""
     dates = set()
-    dates |= {r["Effective Date"] for r in dist if r["Class"] == cls}
-    dates |= {r["Effective Date"] for r in riders}
-    dates |= {r["Effective Date"] for r in trans if r["Class"] == cls}
-    dates |= {r["Effective Date"] for r in supply}
-    dates |= {r["Effective Date"] for r in supply_tou}
+    dates |= {r.effective_date for r in dist if r.cls == cls}
+    dates |= {r.effective_date for r in riders}
+    dates |= {r.effective_date for r in trans if r.cls == cls}
+    dates |= {r.effective_date for r in supply}
+    dates |= {r.effective_date for r in supply_tou}
 
     if is_seasonal(dist, cls) and dates:
         dates |= season_transition_dates(min(d.year for d in dates), as_of_today.year)
 
-    return sorted(d for d in dates if d <= as_of_today)
+    timeline = sorted(d for d in dates if d <= as_of_today)
+    profiling.count(f"timeline_dates[{cls}]", len(timeline))
+    return timeline
+
+
+@profiling.timed("load_components")
+def load_components():
+    """Every component file, indexed for as-of lookups:
+    (riders, dist, trans, supply, supply_tou)."""
+    return (
+        RateIndex(load_riders()),
+        RateIndex(load_distribution_base(), "cls", "season"),
+        RateIndex(load_transmission(), "cls"),
+        RateIndex(load_supply()),
+        RateIndex(load_supply_tou(), "period"),
+    )
 
 
-def build_tables(as_of_today):
-    riders = load_riders()
-    dist = load_distribution_base()
-    trans = load_transmission()
-    supply = load_supply()
-    supply_tou = load_supply_tou()
+def price_date(components, cls, dt, seasonal, periods):
+    """(flat row or None, TOU rows for periods) for one class on one date,
+    each component looked up as of dt. Both are empty until a distribution
+    rate is in effect for the class and season."""
+    riders, dist, trans, supply, supply_tou = components
+    season = get_season(dt) if seasonal else "All"
+    distribution = distribution_total(dist, riders, dt, cls, season)
+    if distribution is None:
+        return None, []  # no distribution data yet in effect for this class/season
+    distribution = round(distribution, 4)
+
+    flat_row = None
+    flat = flat_components(supply, trans, dt, cls)
+    if flat is not None:
+        supply_rate, transmission_rate = flat
+        total = round(distribution + supply_rate + transmission_rate, 4)
+        flat_row = FlatRate(dt, cls, season, distribution, supply_rate, transmission_rate, total)
+
+    tou_rows = []
+    for period in periods:
+        tou = tou_components(supply_tou, trans, dt, cls, period)
+        if tou is None:
+            continue  # TOU pilot data not yet in effect on this date
+        supply_rate, transmission_rate = tou
+        total = round(distribution + supply_rate + transmission_rate, 4)
+        tou_rows.append(TouRate(dt, cls, season, period, distribution, supply_rate, transmission_rate, total))
+    return flat_row, tou_rows
+
+
+@profiling.timed("build_tables")
+def build_tables(as_of_today, since=None, components=None):
+    """Flat and TOU rows for every timeline date up to as_of_today.
+
+    With since, only timeline dates on or after it are evaluated — the
+    incremental build splices those onto rows it already has.
+    """
+    components = components or load_components()
+    riders, dist, trans, supply, supply_tou = components
 
     flat_rows = []
     tou_rows = []
@@ -217,66 +307,300 @@ def build_tables(as_of_today):
     for cls in CLASSES:
         seasonal = is_seasonal(dist, cls)
         timeline = timeline_for(dist, riders, trans, supply, supply_tou, cls, as_of_today)
+        if since is not None:
+            timeline = timeline[bisect_left(timeline, since):]
 
         for dt in timeline:
-            season = get_season(dt) if seasonal else "All"
-            distribution = distribution_total(dist, riders, dt, cls, season)
-            if distribution is None:
+            flat_row, tou = price_date(components, cls, dt, seasonal, TOU_PERIODS)
+            if flat_row is not None:
+                flat_rows.append(flat_row)
+            tou_rows += tou
+
+    profiling.count("flat_rows_emitted", len(flat_rows))
+    profiling.count("tou_rows_emitted", len(tou_rows))
+    return flat_rows, tou_rows
+
+
+def upcoming_tables(as_of_today, components=None):
+    """Rows for every change point after as_of_today that is already known:
+    future-dated filings in the data files and upcoming season flips. Used
+    to give published rates an exact validity window."""
+    components = components or load_components()
+    horizon = upcoming_horizon(as_of_today, components)
+    return build_tables(horizon, since=as_of_today + timedelta(days=1), components=components)
+
+
+def upcoming_horizon(as_of_today, components):
+    """Last date upcoming_tables() looks at: far enough to reach every filed
+    row and the next two season flips, so the first upcoming row has a
+    known end as well."""
+    last_filed = max((r.effective_date for c in components for r in c), default=as_of_today)
+    return max(last_filed, as_of_today + timedelta(days=366))
+
+
+def upcoming_records(as_of_today, components=None):
+    """upcoming_tables() as (flat, tou) records, in output order."""
+    flat_rows, tou_rows = upcoming_tables(as_of_today, components)
+    return sort_flat(flat_rows), sort_tou(tou_rows)
+
+
+def change_points(rows, component, *keys):
+    """(date, component, key, row) for every point a component steps to a new
+    value, ordered by date. Duplicate dates for the same key keep the first
+    row in file order, the same tie-break as as_of()."""
+    points = {}
+    for r in rows:
+        points.setdefault((r.effective_date, tuple(getattr(r, k) for k in keys)), r)
+    return sorted(
+        ((dt, component, key, row) for (dt, key), row in points.items()),
+        key=lambda p: p[0],
+    )
+
+
+def season_flips(start_year, as_of_today):
+    for year in range(start_year, as_of_today.year + 1):
+        for month, day, _ in SEASONS:
+            yield date(year, month, day), "season", (), None
+
+
+def sweep_class(dist, riders, trans, supply, supply_tou, cls, as_of_today,
+                flat_rows, tou_rows):
+    """Sweep-line equivalent of evaluating timeline_for() date by date.
+
+    Every component is a step function; their change points are merged in
+    one ordered pass and only the component that changed is updated, so the
+    cost is O(change events) rather than O(dates x rows).
+    """
+    streams = [
+        change_points(riders, "riders"),
+        change_points((r for r in dist if r.cls == cls), "dist", "season"),
+        change_points((r for r in trans if r.cls == cls), "trans"),
+        change_points(supply, "supply"),
+        change_points(supply_tou, "tou", "period"),
+    ]
+    seasonal = is_seasonal(dist, cls)
+    if seasonal and any(streams):
+        first_year = min(s[0][0] for s in streams if s).year
+        streams.append(season_flips(first_year, as_of_today))
+
+    rider_row = trans_row = supply_row = None
+    base = {}
+    tou = {}
+    distribution = {}  # per season, dropped whenever its inputs change
+
+    events = heapq.merge(*streams, key=lambda e: e[0])
+    for dt, changes in groupby(events, key=lambda e: e[0]):
+        if dt > as_of_today:
+            break
+
+        for _, component, key, row in changes:
+            if component == "riders":
+                rider_row = row
+                distribution.clear()
+            elif component == "dist":
+                base[key[0]] = row
+                distribution.pop(key[0], None)
+            elif component == "trans":
+                trans_row = row
+            elif component == "supply":
+                supply_row = row
+            elif component == "tou":
+                tou[key[0]] = row
+
+        season = get_season(dt) if seasonal else "All"
+        if season not in distribution:
+            base_row = base.get(season)
+            if base_row is None or rider_row is None:
                 continue  # no distribution data yet in effect for this class/season
-            distribution = round(distribution, 4)
-
-            flat = flat_components(supply, trans, dt, cls)
-            if flat is not None:
-                supply_rate, transmission_rate = flat
-                total = round(distribution + supply_rate + transmission_rate, 4)
-                flat_rows.append((dt, cls, season, distribution, supply_rate, transmission_rate, total))
-
-            for period in TOU_PERIODS:
-                tou = tou_components(supply_tou, trans, dt, cls, period)
-                if tou is None:
-                    continue  # TOU pilot data not yet in effect on this date
-                supply_rate, transmission_rate = tou
-                total = round(distribution + supply_rate + transmission_rate, 4)
-                tou_rows.append((dt, cls, season, period, distribution, supply_rate, transmission_rate, total))
+            distribution[season] = round(compound_distribution(base_row, rider_row), 4)
+        dist_rate = distribution[season]
+
+        if trans_row is None:
+            continue
+        transmission_rate = trans_row.transmission
+
+        if supply_row is not None:
+            supply_rate = supply_row.rate
+            total = round(dist_rate + supply_rate + transmission_rate, 4)
+            flat_rows.append(FlatRate(dt, cls, season, dist_rate, supply_rate, transmission_rate, total))
+
+        for period in TOU_PERIODS:
+            tou_row = tou.get(period)
+            if tou_row is None:
+                continue  # TOU pilot data not yet in effect on this date
+            supply_rate = tou_row.rate
+            total = round(dist_rate + supply_rate + transmission_rate, 4)
+            tou_rows.append(TouRate(dt, cls, season, period, dist_rate, supply_rate, transmission_rate, total))
+
 
+@profiling.timed("sweep_tables")
+def sweep_tables(as_of_today, components=None):
+    """Same flat and TOU tuples as build_tables(), built with sweep_class()."""
+    riders, dist, trans, supply, supply_tou = components or load_components()
+
+    flat_rows = []
+    tou_rows = []
+    for cls in CLASSES:
+        sweep_class(dist, riders, trans, supply, supply_tou, cls, as_of_today, flat_rows, tou_rows)
+    profiling.count("flat_rows_emitted", len(flat_rows))
+    profiling.count("tou_rows_emitted", len(tou_rows))
     return flat_rows, tou_rows
 
 
-def write_output(flat_rows, tou_rows):
-    OUTPUT.mkdir(exist_ok=True)
+def class_tables(components, cls, as_of_today, horizon=None):
+    """(flat, tou, upcoming flat, upcoming tou) rows for one class from a
+    single sweep through the upcoming horizon, split at as_of_today."""
+    riders, dist, trans, supply, supply_tou = components
+    if horizon is None:
+        horizon = upcoming_horizon(as_of_today, components)
+    flat, tou = [], []
+    sweep_class(dist, riders, trans, supply, supply_tou, cls, horizon, flat, tou)
+    return (
+        [r for r in flat if r[0] <= as_of_today],
+        [r for r in tou if r[0] <= as_of_today],
+        [r for r in flat if r[0] > as_of_today],
+        [r for r in tou if r[0] > as_of_today],
+    )
+
+
+PERIOD_ORDER = {"Off-Peak": 0, "Peak": 1, "Super Off-Peak": 2}
+
 
+@profiling.timed("sort_flat")
+def sort_flat(flat_rows):
     # Class ascending (RA, RH, RS), Effective Date descending (newest first)
-    # within each class. Two stable sorts, least-significant key first.
-    flat_sorted = sorted(flat_rows, key=lambda r: r[0], reverse=True)  # date desc
-    flat_sorted = sorted(flat_sorted, key=lambda r: r[1])              # class asc
+    # within each class.
+    return sorted(flat_rows, key=lambda r: (r[1], -r[0].toordinal()))
 
-    with open(OUTPUT / "rates.csv", "w", newline="") as f:
-        w = csv.writer(f, lineterminator="\n")
-        w.writerow(["Effective Date", "Class", "Season", "Distribution Rate", "Supply Rate",
-                    "Transmission Rate", "Total Rate"])
-        for row in flat_sorted:
-            w.writerow(row)
 
-    # New: TOU rates, same shape plus a Period column. Not yet wired into
-    # generate_json.py / html_rates.py — kept separate until we know how
-    # TOU currently reaches the site.
+@profiling.timed("sort_tou")
+def sort_tou(tou_rows):
     # Class ascending, Effective Date descending, Period in the fixed
     # Off-Peak / Peak / Super Off-Peak display order (not alphabetical).
-    period_order = {"Off-Peak": 0, "Peak": 1, "Super Off-Peak": 2}
-    tou_sorted = sorted(tou_rows, key=lambda r: period_order[r[3]])  # period, fixed order
-    tou_sorted = sorted(tou_sorted, key=lambda r: r[0], reverse=True)  # date desc
-    tou_sorted = sorted(tou_sorted, key=lambda r: r[1])                # class asc
+    return sorted(tou_rows, key=lambda r: (r[1], -r[0].toordinal(), PERIOD_ORDER[r[3]]))
+
+
+def timeline_desc(components, cls, start, end):
+    """timeline_for()'s dates in [start, end], newest first, merged lazily
+    from the indexes' sorted date arrays; dates outside the window are
+    never visited."""
+    riders, dist, trans, supply, supply_tou = components
+    arrays = [dates for key, (dates, _) in dist.groups.items() if key[0] == cls]
+    arrays += [dates for key, (dates, _) in trans.groups.items() if key[0] == cls]
+    for index in (riders, supply, supply_tou):
+        arrays += [dates for dates, _ in index.groups.values()]
 
-    with open(OUTPUT / "rates_tou.csv", "w", newline="") as f:
+    streams = []
+    for dates in arrays:
+        lo = 0 if start is None else bisect_left(dates, start)
+        streams.append(map(dates.__getitem__, range(bisect_right(dates, end) - 1, lo - 1, -1)))
+    if is_seasonal(dist, cls) and any(arrays):
+        first_year = min(dates[0] for dates in arrays if dates).year
+        flips = season_transition_dates(max(first_year, start.year if start else first_year), end.year)
+        streams.append(sorted((d for d in flips if d <= end and (start is None or d >= start)), reverse=True))
+
+    for dt, _ in groupby(heapq.merge(*streams, reverse=True)):
+        yield dt
+
+
+def class_rows(components, cls, start=None, end=None, periods=None):
+    """(flat row or None, TOU rows) for each of cls's timeline dates in
+    [start, end], newest first: build_tables()'s rows, already in output
+    order, priced one date at a time from the indexes."""
+    end = end or date.today()
+    seasonal = is_seasonal(components[1], cls)
+    periods = [p for p in sorted(TOU_PERIODS, key=PERIOD_ORDER.__getitem__) if not periods or p in periods]
+
+    for dt in timeline_desc(components, cls, start, end):
+        yield price_date(components, cls, dt, seasonal, periods)
+
+
+def iter_rows(components, classes=None, start=None, end=None, periods=None):
+    """class_rows() for every class (or just classes), class ascending."""
+    for cls in sorted(classes or CLASSES):
+        yield from class_rows(components, cls, start, end, periods)
+
+
+def write_csv(path, header, rows):
+    with open(path, "w", newline="") as f:
         w = csv.writer(f, lineterminator="\n")
-        w.writerow(["Effective Date", "Class", "Season", "Period", "Distribution Rate", "Supply Rate",
-                    "Transmission Rate", "Total Rate"])
-        for row in tou_sorted:
+        w.writerow(header)
+        for row in rows:
             w.writerow(row)
 
 
+def csv_chunk(rows):
+    """rows encoded as write_csv() writes them, without the header."""
+    buf = io.StringIO()
+    csv.writer(buf, lineterminator="\n").writerows(rows)
+    return buf.getvalue()
+
+
+def write_chunks(path, header, chunks):
+    """A CSV file from csv_chunk() pieces already in output order."""
+    with open(path, "w", newline="") as f:
+        csv.writer(f, lineterminator="\n").writerow(header)
+        f.writelines(chunks)
+
+
+@profiling.timed("write_output")
+def write_output(flat_sorted, tou_sorted):
+    """Write rates.csv and rates_tou.csv from rows already in output order
+    (sort_flat() / sort_tou())."""
+    OUTPUT.mkdir(exist_ok=True)
+    write_csv(OUTPUT / "rates.csv", FLAT_HEADER, flat_sorted)
+    # TOU rates, same shape plus a Period column.
+    write_csv(OUTPUT / "rates_tou.csv", TOU_HEADER, tou_sorted)
+
+
+@profiling.timed("stream_output")
+def stream_output(rows, flat_file=None, tou_file=None):
+    """Write iter_rows() output to open text files as it is generated;
+    either file may be None to skip that table. Returns (flat, TOU) counts."""
+    flat_writer = flat_file and csv.writer(flat_file, lineterminator="\n")
+    tou_writer = tou_file and csv.writer(tou_file, lineterminator="\n")
+    if flat_writer:
+        flat_writer.writerow(FLAT_HEADER)
+    if tou_writer:
+        tou_writer.writerow(TOU_HEADER)
+    flat_count = tou_count = 0
+    for flat_row, tou_rows in rows:
+        if flat_writer and flat_row is not None:
+            flat_writer.writerow(flat_row)
+            flat_count += 1
+        if tou_writer:
+            tou_writer.writerows(tou_rows)
+            tou_count += len(tou_rows)
+    return flat_count, tou_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the flat and TOU rate tables.")
+    parser.add_argument("--from", dest="start", type=date.fromisoformat,
+                        help="only rows effective on or after this date")
+    parser.add_argument("--to", dest="end", type=date.fromisoformat, default=date.today(),
+                        help="only rows effective on or before this date (default: today)")
+    parser.add_argument("--class", dest="classes", nargs="+", metavar="CLASS", choices=CLASSES)
+    parser.add_argument("--period", dest="periods", nargs="+", metavar="PERIOD", choices=TOU_PERIODS,
+                        help="TOU periods to include")
+    parser.add_argument("--stdout", choices=["flat", "tou"], help="write just this table to stdout")
+    args = parser.parse_args()
+
+    rows = iter_rows(load_components(), args.classes, args.start, args.end, args.periods)
+    if args.stdout:
+        try:
+            stream_output(rows, **{f"{args.stdout}_file": sys.stdout})
+        except BrokenPipeError:  # e.g. piped into head; stop quietly
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return
+
+    OUTPUT.mkdir(exist_ok=True)
+    with open(OUTPUT / "rates.csv", "w", newline="") as flat_file, \
+            open(OUTPUT / "rates_tou.csv", "w", newline="") as tou_file:
+        flat_count, tou_count = stream_output(rows, flat_file, tou_file)
+    print(f"Wrote {OUTPUT / 'rates.csv'} ({flat_count} rows)")
+    print(f"Wrote {OUTPUT / 'rates_tou.csv'} ({tou_count} rows)")
+
+
 if __name__ == "__main__":
-    flat_rows, tou_rows = build_tables(date.today())
-    write_output(flat_rows, tou_rows)
-    print(f"Wrote {OUTPUT / 'rates.csv'} ({len(flat_rows)} rows)")
-    print(f"Wrote {OUTPUT / 'rates_tou.csv'} ({len(tou_rows)} rows)")
+    main()
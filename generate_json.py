@@ -1,8 +1,14 @@
-import csv
+import hashlib
 import json
 import os
+import sys
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
-from datetime import datetime, date
+from datetime import date
+
+import csv_rates
+import profiling
+import records
 
 OUTPUT_DIR = "output"
 
@@ -10,70 +16,253 @@ RATES_CSV = os.path.join(OUTPUT_DIR, "rates.csv")
 RATES_TOU_CSV = os.path.join(OUTPUT_DIR, "rates_tou.csv")
 RATES_JSON = os.path.join(OUTPUT_DIR, "rates.json")
 
-def read_csv(path):
-    rows = []
-    with open(path, newline="") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            for col in ["Distribution Rate", "Supply Rate", "Transmission Rate", "Total Rate"]:
-                row[col] = float(row[col])
-            rows.append(row)
-    return rows
-
-def generate_json(flat_csv=RATES_CSV, tou_csv=RATES_TOU_CSV, output_file=RATES_JSON):
-    flat_rates = read_csv(flat_csv)
-    tou_rates = read_csv(tou_csv)
+# Sharded static API: small minified files named by content hash, so they
+# can be cached forever, plus an unhashed manifest.json pointing at them.
+API_DIR = os.path.join(OUTPUT_DIR, "api")
+API_MANIFEST = "manifest.json"
+# Shards stay on disk while any of the last API_GENERATIONS manifests
+# (recorded in API_GENERATIONS_FILE) refers to them, so a client or CDN
+# still holding an older manifest can fetch what it points at.
+API_GENERATIONS = 3
+API_GENERATIONS_FILE = "generations.json"
+
+def read_csv(path, tou=False):
+    """An output CSV as FlatRate / TouRate records, each value parsed once."""
+    return records.read_tou(path) if tou else records.read_flat(path)
+
+def generate_json(flat_csv=RATES_CSV, tou_csv=RATES_TOU_CSV, output_file=RATES_JSON, publish_upcoming=False):
+    upcoming_flat, upcoming_tou = csv_rates.upcoming_records(date.today())
+    write_json(read_csv(flat_csv), read_csv(tou_csv, tou=True), output_file, api_dir=API_DIR,
+               upcoming=(upcoming_flat, upcoming_tou), publish_upcoming=publish_upcoming)
+    print(f"JSON file written to {output_file}")
+    print(f"JSON API written to {API_DIR}")
+
+@profiling.timed("generate_json.group_by_class")
+def group_by_class(rows):
+    """{class: (dates, rows)} with each class's rows sorted oldest → newest.
+
+    The sort is stable, so rows sharing a date keep their input order
+    (Off-Peak, Peak, Super Off-Peak for TOU). A (class, date) group is then a
+    contiguous slice of rows.
+    """
+    grouped = defaultdict(list)
+    for row in rows:
+        grouped[row.cls].append((row.effective_date, row))
+    result = {}
+    for cls, pairs in grouped.items():
+        pairs.sort(key=lambda p: p[0])
+        result[cls] = ([d for d, _ in pairs], [r for _, r in pairs])
+    return result
+
+def current_index(dates, today):
+    """Index of the first row of the latest date on or before today, falling
+    back to the earliest row if everything is still in the future."""
+    i = bisect_right(dates, today)
+    if i == 0:
+        return 0
+    return bisect_left(dates, dates[i - 1])
+
+def add_windows(rows, upcoming_rows, header, key):
+    """rows (records, oldest → newest) as published dicts with a validity
+    window added; dates become ISO strings here and nowhere earlier.
+
+    valid_from is the row's own effective date; valid_until is the effective
+    date of the next row in the same series (key: class, or class + period),
+    looking ahead into upcoming_rows — already-filed future rows and season
+    flips. valid_until is exclusive, and None when no later change is known.
+    """
+    next_date = {}
+    for row in reversed(upcoming_rows):
+        next_date[key(row)] = row.effective_date.isoformat()
+    windowed = []
+    for row in reversed(rows):
+        k = key(row)
+        iso = row.effective_date.isoformat()
+        windowed.append(dict(zip(header, (iso, *row[1:])), valid_from=iso, valid_until=next_date.get(k)))
+        next_date[k] = iso
+    windowed.reverse()
+    return windowed
+
+@profiling.timed("generate_json")
+def write_json(flat_rates, tou_rates, output_file=RATES_JSON, api_dir=None,
+               upcoming=None, publish_upcoming=False):
+    """flat_rates / tou_rates are FlatRate / TouRate records in rates.csv /
+    rates_tou.csv order, either read back from disk or handed over in memory
+    by build.py.
+    Writes rates.json and, if api_dir is given, the sharded API there.
+
+    upcoming is (flat, tou) records for known change points after today (see
+    csv_rates.upcoming_tables); it closes the validity window of the current
+    rates, and with publish_upcoming the rows themselves are published too.
+    """
+    data = build_data(flat_rates, tou_rates, upcoming, publish_upcoming)
+
+    with profiling.stage("generate_json.dump"):
+        write_document(encode_classes(data), output_file)
+
+    if api_dir is not None:
+        with profiling.stage("generate_json.api"):
+            write_api(data, api_dir)
+
+def encode_classes(data):
+    """{class: minified JSON of its entry}. json.dumps (not json.dump, which
+    streams through the pure-Python encoder) encodes each in one C call."""
+    return {cls: json.dumps(entry, separators=(",", ":")) for cls, entry in data.items()}
+
+def write_document(encoded, output_file=RATES_JSON):
+    """Write rates.json, minified, from encode_classes() output."""
+    with open(output_file, "w") as f:
+        f.write("{" + ",".join(f"{json.dumps(cls)}:{entry}" for cls, entry in encoded.items()) + "}\n")
+
+def build_data(flat_rates, tou_rates, upcoming=None, publish_upcoming=False):
+    """{class: {"current", "history", "tou_history"}} in class order — the
+    rates.json document, plus "upcoming" / "tou_upcoming" per class with
+    publish_upcoming."""
     data = defaultdict(lambda: {"current": {}, "history": [], "tou_history": []})
     today = date.today()
+    upcoming_flat, upcoming_tou = upcoming or ([], [])
+    upcoming_flat = {cls: rows for cls, (_, rows) in group_by_class(upcoming_flat).items()}
+    upcoming_tou = {cls: rows for cls, (_, rows) in group_by_class(upcoming_tou).items()}
+    by_period = lambda r: r.period
 
     # --- Flat rates ---
-    for row in flat_rates:
-        cls = row["Class"]
-        data[cls]["history"].append(row)
-
-    for cls in data:
-        # RS flat all year: ignore season in current
-        if cls == "RS":
-            past_rates = [r for r in data[cls]["history"] if datetime.fromisoformat(r["Effective Date"]).date() <= today]
-            latest = max(past_rates, key=lambda r: datetime.fromisoformat(r["Effective Date"])) if past_rates else \
-                     min(data[cls]["history"], key=lambda r: datetime.fromisoformat(r["Effective Date"]))
-            data[cls]["current"]["flat"] = latest
-        else:  # RA/RH seasonal
-            past_rates = [r for r in data[cls]["history"] if datetime.fromisoformat(r["Effective Date"]).date() <= today]
-            latest = max(past_rates, key=lambda r: datetime.fromisoformat(r["Effective Date"])) if past_rates else \
-                     min(data[cls]["history"], key=lambda r: datetime.fromisoformat(r["Effective Date"]))
-            data[cls]["current"]["flat"] = latest
+    for cls, (dates, rows) in group_by_class(flat_rates).items():
+        ahead = upcoming_flat.get(cls, [])
+        rows = add_windows(rows, ahead, records.FLAT_HEADER, lambda r: None)
+        data[cls]["history"] = rows
+        data[cls]["current"]["flat"] = rows[current_index(dates, today)]
+        if publish_upcoming:
+            data[cls]["upcoming"] = add_windows(ahead, [], records.FLAT_HEADER, lambda r: None)
 
     # --- TOU rates ---
-    for row in tou_rates:
-        cls = row["Class"]
-        data[cls]["tou_history"].append(row)
-
-    for cls in data:
-        past_tou = [r for r in data[cls]["tou_history"] if datetime.fromisoformat(r["Effective Date"]).date() <= today]
-        latest_tou = max(past_tou, key=lambda r: datetime.fromisoformat(r["Effective Date"])) if past_tou else \
-                     min(data[cls]["tou_history"], key=lambda r: datetime.fromisoformat(r["Effective Date"]))
+    for cls, (dates, rows) in group_by_class(tou_rates).items():
+        ahead = upcoming_tou.get(cls, [])
+        rows = add_windows(rows, ahead, records.TOU_HEADER, by_period)
+        data[cls]["tou_history"] = rows
+        if publish_upcoming:
+            data[cls]["tou_upcoming"] = add_windows(ahead, [], records.TOU_HEADER, by_period)
+        start = current_index(dates, today)
+        latest_tou = rows[start]
+        end = bisect_right(dates, dates[start])
 
-        # For RS, we ignore Season in TOU current
-        period_rates = {r["Period"]: r["Total Rate"] for r in tou_rates
-                        if r["Class"] == cls and r["Effective Date"] == latest_tou["Effective Date"] and
-                        (cls != "RS" and r["Season"] == latest_tou["Season"] or cls == "RS")}
+        # For non-seasonal classes (RS), we ignore Season in TOU current
+        seasonal = latest_tou["Season"] != "All"
+        period_rates = {r["Period"]: r["Total Rate"] for r in rows[start:end]
+                        if not seasonal or r["Season"] == latest_tou["Season"]}
 
-        current_tou = {"Season": latest_tou["Season"]} if cls != "RS" else {}
+        current_tou = {"Season": latest_tou["Season"]} if seasonal else {}
         current_tou.update(period_rates)
+        current_tou["valid_from"] = latest_tou["valid_from"]
+        current_tou["valid_until"] = min((r["valid_until"] for r in rows[start:end] if r["valid_until"]),
+                                         default=None)
         data[cls]["current"]["tou"] = current_tou
 
-    # Sort history oldest → newest
-    for cls in data:
-        data[cls]["history"].sort(key=lambda r: datetime.fromisoformat(r["Effective Date"]))
-        data[cls]["tou_history"].sort(key=lambda r: datetime.fromisoformat(r["Effective Date"]))
+    return {cls: data[cls] for cls in sorted(data)}
 
-    # Write JSON
-    with open(output_file, "w") as f:
-        json.dump(data, f, indent=2)
+def current_valid_until(data):
+    """Earliest date any published current rate stops applying — when the
+    manifest (and anything cached from it) goes stale. None if never."""
+    ends = [entry.get("valid_until") for d in data.values() for entry in d["current"].values()]
+    return min((e for e in ends if e), default=None)
 
-    print(f"JSON file written to {output_file}")
+def minified(payload):
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+def api_shards(data, classes=None):
+    """(logical name, payload) for every API file except the manifest.
+
+        current             every class's current flat and TOU rates
+        upcoming            already-known future rates, if published
+        history/CLS/YEAR    one class's flat and TOU rows effective that year
+                            (only for classes, if given)
+    """
+    yield "current", {cls: d["current"] for cls, d in data.items()}
+    upcoming = {cls: {k: d[k] for k in ("upcoming", "tou_upcoming") if k in d} for cls, d in data.items()}
+    if any(upcoming.values()):
+        yield "upcoming", upcoming
+    for cls, d in data.items():
+        if classes is not None and cls not in classes:
+            continue
+        years = defaultdict(lambda: {"history": [], "tou_history": []})
+        for key in ("history", "tou_history"):
+            for row in d[key]:
+                years[row["Effective Date"][:4]][key].append(row)
+        for year in sorted(years):
+            yield f"history/{cls}/{year}", years[year]
+
+def write_api(data, api_dir=API_DIR, classes=None):
+    """Write the content-hashed shards and their manifest; returns the manifest.
+
+    A shard whose content hasn't changed keeps its file name and isn't
+    rewritten. With classes, only those classes' history shards are
+    encoded; the others are taken from the previous manifest. A file is
+    removed once none of the last API_GENERATIONS manifests refers to it.
+    """
+    os.makedirs(api_dir, exist_ok=True)
+    manifest = {"current": None, "valid_until": current_valid_until(data), "history": {}}
+    written = set()
+
+    reuse = {}
+    if classes is not None:
+        previous = load_api_manifest(api_dir).get("history", {})
+        reuse = {cls: previous[cls] for cls in data if cls not in classes and cls in previous
+                 and all(os.path.exists(os.path.join(api_dir, n)) for n in previous[cls].values())}
+    history = {}
+
+    for logical, payload in api_shards(data, set(data) - set(reuse)):
+        body = minified(payload)
+        name = f"{logical.replace('/', '-')}.{hashlib.sha256(body).hexdigest()[:16]}.json"
+        path = os.path.join(api_dir, name)
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(body)
+        written.add(name)
+
+        if logical in ("current", "upcoming"):
+            manifest[logical] = name
+        else:
+            _, cls, year = logical.split("/")
+            history.setdefault(cls, {})[year] = name
+    for years in reuse.values():
+        written.update(years.values())
+    manifest["history"] = {cls: reuse[cls] if cls in reuse else history[cls]
+                           for cls in data if cls in reuse or cls in history}
+
+    tmp = os.path.join(api_dir, API_MANIFEST + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, separators=(",", ":"))
+    os.replace(tmp, os.path.join(api_dir, API_MANIFEST))
+
+    generations = load_generations(api_dir)
+    if not generations or set(generations[0]) != written:
+        generations.insert(0, sorted(written))
+    generations = generations[:API_GENERATIONS]
+    tmp = os.path.join(api_dir, API_GENERATIONS_FILE + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(generations, f, separators=(",", ":"))
+    os.replace(tmp, os.path.join(api_dir, API_GENERATIONS_FILE))
+
+    keep = {name for generation in generations for name in generation}
+    for name in os.listdir(api_dir):
+        if name not in keep and name not in (API_MANIFEST, API_GENERATIONS_FILE) and name.endswith(".json"):
+            os.remove(os.path.join(api_dir, name))
+    return manifest
+
+def load_api_manifest(api_dir):
+    try:
+        with open(os.path.join(api_dir, API_MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def load_generations(api_dir):
+    """Shard names of the most recent manifests, newest first."""
+    try:
+        with open(os.path.join(api_dir, API_GENERATIONS_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
 
 if __name__ == "__main__":
-    generate_json()
+    generate_json(publish_upcoming="--upcoming" in sys.argv[1:])
 
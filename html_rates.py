@@ -1,67 +1,51 @@
 #!/usr/bin/env python3
 
-import csv
 import json
-from pathlib import Path
+from datetime import date
+
+import profiling
+import records
 
 # Input files
 RATES_CSV = "output/rates.csv"
 RATES_TOU_CSV = "output/rates_tou.csv"
 OUTPUT_HTML = "docs/index.html"
-MAX_ROWS = 20  # rows to show initially
+MAX_ROWS = 20  # rows per table page
+CHART_POINTS = 120  # most points plotted per class chart
 
 # --- Read CSV ---
 def read_csv(file_path, tou=False):
-    rates = {}
-    with open(file_path, newline="") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            cls = row["Class"]
-            if cls not in rates:
-                rates[cls] = []
-
-            # Calculate PTC and round to 4 decimal places to avoid floating point issues
-            supply = float(row["Supply Rate"])
-            transmission = float(row["Transmission Rate"])
-            ptc = round(supply + transmission, 4)
-
-            rate_data = {
-                "date": row["Effective Date"],
-                "season": row["Season"],
-                "distribution_rate": float(row["Distribution Rate"]),
-                "ptc_rate": ptc,
-                "total_rate": float(row["Total Rate"]),
-            }
-
-            if tou:
-                rate_data["period"] = row["Period"]
-
-            rates[cls].append(rate_data)
+    return group_rates(records.read_tou(file_path) if tou else records.read_flat(file_path))
 
-    # Sort newest to oldest
+# --- Group rate records (from CSV or in memory) by class ---
+@profiling.timed("html_rates.group_rates")
+def group_rates(rows):
+    """{class: FlatRate / TouRate records}, each class's newest first."""
+    rates = {}
+    for row in rows:
+        rates.setdefault(row.cls, []).append(row)
     for cls_rates in rates.values():
-        cls_rates.sort(key=lambda r: r['date'], reverse=True)
+        cls_rates.sort(key=lambda r: r.effective_date, reverse=True)
     return rates
 
-def generate_html(flat_rates, tou_rates):
-    classes = ["RS", "RH", "RA"]
-    rate_definitions = {
-        "RS": "RS (Residential Service)",
-        "RA": "RA (Residential Add-On Heat Pump)",
-        "RH": "RH (Residential Heating)"
-    }
-
-    # Serialize flat rates to JSON to pass to Chart.js
-    rates_json_str = json.dumps(flat_rates)
-
-    html = """
+CLASSES = ["RS", "RH", "RA"]
+RATE_DEFINITIONS = {
+    "RS": "RS (Residential Service)",
+    "RA": "RA (Residential Add-On Heat Pump)",
+    "RH": "RH (Residential Heating)"
+}
+
+# --- Page templates ---
+# Static parts of the page, plus the per-row markup as pre-bound str.format
+# methods so the row loops only fill in values.
+PAGE_HEAD = """
 <!DOCTYPE html>
 <html lang="en">
 <head>
 <meta charset="UTF-8">
 <meta name="viewport" content="width=device-width, initial-scale=1.0">
 <title>Duquesne Light Company Electric Rates</title>
-<script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
+<script defer src="https://cdn.jsdelivr.net/npm/chart.js"></script>
 <style>
 body { font-family: Arial, sans-serif; padding: 20px; line-height: 1.5; }
 h1 { margin-bottom: 10px; }
@@ -92,8 +76,8 @@ a { color: #0066cc; text-decoration: none; }
 a:hover { text-decoration: underline; }
 .info { background-color: #ffffe0; padding: 15px; border-left: 5px solid #ffcc00; margin-bottom: 20px; max-width: 1000px; }
 .info details { background-color: #f9f9f9; padding: 10px; margin-bottom: 10px; }
-.extra-row { display: none; }
-.show-more-btn { margin: 5px 0 15px 0; padding: 5px 10px; cursor: pointer; }
+.pager { margin: 5px 0 15px 0; color: #555; font-size: 0.9em; }
+.pager button { margin-right: 5px; padding: 5px 10px; cursor: pointer; }
 </style>
 </head>
 <body>
@@ -138,187 +122,226 @@ a:hover { text-decoration: underline; }
 
 <div id="tabs">
 """
-    # Tab buttons
-    for cls in classes:
-        html += f'<div class="tab" data-class="{cls}">{rate_definitions[cls]}</div>\n'
-    html += '</div>\n'
 
-    # Sections per class
-    for cls in classes:
-        flat_colspan = 4
-        tou_colspan = 5
+TAB = '<div class="tab" data-class="{0}">{1}</div>\n'.format
 
-        html += f'<div class="section" id="section-{cls}">\n'
-        html += f"<h2>{rate_definitions[cls]}</h2>\n"
+SECTION_START = """<div class="section" id="section-{0}">
+<h2>{1}</h2>
 
-        # --- Toggle Buttons ---
-        html += f"""
         <div class="rate-type-toggle">
-            <button class="toggle-btn active" onclick="switchRateType(event, '{cls}', 'flat')">Flat Rates</button>
-            <button class="toggle-btn" onclick="switchRateType(event, '{cls}', 'tou')">Time-of-Use Rates</button>
+            <button class="toggle-btn active" onclick="switchRateType(event, '{0}', 'flat')">Flat Rates</button>
+            <button class="toggle-btn" onclick="switchRateType(event, '{0}', 'tou')">Time-of-Use Rates</button>
         </div>
-        """
-
-        # --- Flat rates Container ---
-        html += f'<div id="{cls}-flat" class="rate-container active">\n'
-
-        # Chart.js Canvas
-        html += f'<div class="chart-container"><canvas id="chart-{cls}"></canvas></div>\n'
-
-        html += f"<table>\n<tr><th>Effective Date</th><th class='num'>Total (&cent;/kWh)</th><th class='num'>Price to Compare (&cent;/kWh)</th><th class='num'>Distribution (&cent;/kWh)</th></tr>\n"
-        for i, r in enumerate(flat_rates.get(cls, [])):
-            row_class = "extra-row" if i >= MAX_ROWS else ""
-            display_date = f"{r['date']} ({r['season']})" if cls in ("RA", "RH") else r['date']
-            html += f"<tr class='{row_class}'><td>{display_date}</td><td class='num'>{r['total_rate']:.2f}</td><td class='num'>{r['ptc_rate']:.2f}</td><td class='num'>{r['distribution_rate']:.2f}</td></tr>\n"
-
-        if len(flat_rates.get(cls, [])) > MAX_ROWS:
-            html += f"<tr><td colspan='{flat_colspan}'><button class='show-more-btn' onclick='showMore(this)'>Show More</button></td></tr>\n"
-        html += "</table>\n</div>\n"
-
-        # --- TOU rates Container ---
-        html += f'<div id="{cls}-tou" class="rate-container">\n'
-        html += f"<table>\n<tr><th>Effective Date</th><th>Period</th><th class='num'>Total (&cent;/kWh)</th><th class='num'>Price to Compare (&cent;/kWh)</th><th class='num'>Distribution (&cent;/kWh)</th></tr>\n"
-
-        last_date = None
-
-        for i, r in enumerate(tou_rates.get(cls, [])):
-            is_new_group = False
-            if r['date'] != last_date:
-                last_date = r['date']
-                is_new_group = True
-
-            # Apply a top border if it's a new group (but skip the very first row)
-            classes_list = []
-            if is_new_group and i > 0:
-                classes_list.append("group-start")
-            if i >= MAX_ROWS:
-                classes_list.append("extra-row")
-
-            row_class = " ".join(classes_list)
-            class_attr = f" class='{row_class}'" if row_class else ""
-
-            # Only print the date if it is the first row of a new group
-            display_date = ""
-            if is_new_group:
-                display_date = f"{r['date']} ({r['season']})" if cls in ("RA", "RH") else r['date']
-
-            html += f"<tr{class_attr}><td class='date-cell'><strong>{display_date}</strong></td><td>{r['period']}</td><td class='num'>{r['total_rate']:.2f}</td><td class='num'>{r['ptc_rate']:.2f}</td><td class='num'>{r['distribution_rate']:.2f}</td></tr>\n"
-
-        if len(tou_rates.get(cls, [])) > MAX_ROWS:
-            html += f"<tr><td colspan='{tou_colspan}'><button class='show-more-btn' onclick='showMore(this)'>Show More</button></td></tr>\n"
-
-        html += "</table>\n</div>\n"
-        html += "</div>\n"
+        <div id="{0}-flat" class="rate-container active">
+<div class="chart-container"><canvas id="chart-{0}"></canvas></div>
+<table>
+<thead><tr><th>Effective Date</th><th class='num'>Total (&cent;/kWh)</th><th class='num'>Price to Compare (&cent;/kWh)</th><th class='num'>Distribution (&cent;/kWh)</th></tr></thead>
+<tbody id="{0}-flat-rows">
+""".format
+
+FLAT_ROW = "<tr><td>{0}</td><td class='num'>{1:.2f}</td><td class='num'>{2:.2f}</td><td class='num'>{3:.2f}</td></tr>\n".format
+
+TOU_START = """</div>
+<div id="{0}-tou" class="rate-container">
+<table>
+<thead><tr><th>Effective Date</th><th>Period</th><th class='num'>Total (&cent;/kWh)</th><th class='num'>Price to Compare (&cent;/kWh)</th><th class='num'>Distribution (&cent;/kWh)</th></tr></thead>
+<tbody id="{0}-tou-rows">
+""".format
+
+TOU_ROW = "<tr{0}><td class='date-cell'><strong>{1}</strong></td><td>{2}</td><td class='num'>{3:.2f}</td><td class='num'>{4:.2f}</td><td class='num'>{5:.2f}</td></tr>\n".format
+
+# Rows past the first page are paged in by the script; readers without it
+# get the first page and this note.
+TABLE_END = '</tbody>\n</table>\n<div class="pager" id="{0}-{1}-pager">{2}</div>\n'.format
+
+NOSCRIPT_NOTE = "<noscript>Showing the {0} most recent of {1} rates.</noscript>".format
+
+SECTION_END = "</div>\n</div>\n"
+
+# Payload decoding, paging, tabs, toggles and chart logic. The rate payload
+# JSON goes between PAGE_SCRIPT_START and PAGE_SCRIPT_END.
+PAGE_SCRIPT_START = '\n<script>\nconst PAGE_SIZE = {0};\n// --- Rate data: one columnar payload per class ---\nconst ratePayload = '.format
+
+PAGE_SCRIPT_END = """;
+
+// Dates are day offsets from the payload's epoch; rates are integer
+// hundredths of a cent; seasons and periods are indexes into name lists.
+// Rows are newest first, as in the tables.
+function rowDate(p, s, i) {
+    return new Date(Date.parse(p.epoch) + s.d[i] * 86400000).toISOString().slice(0, 10);
+}
+
+function dateLabel(p, s, i) {
+    const d = rowDate(p, s, i);
+    return p.seasonal ? d + ' (' + p.seasons[s.s[i]] + ')' : d;
+}
+
+function cents(v) {
+    return (v / 100).toFixed(2);
+}
+
+function rateCells(s, i) {
+    return "<td class='num'>" + cents(s.t[i]) + "</td><td class='num'>" + cents(s.p[i]) +
+        "</td><td class='num'>" + cents(s.x[i]) + "</td></tr>\\n";
+}
+
+// Same markup as the first page rendered at build time.
+function flatRow(p, i) {
+    return '<tr><td>' + dateLabel(p, p.flat, i) + '</td>' + rateCells(p.flat, i);
+}
+
+function touRow(p, i, first) {
+    const s = p.tou;
+    const newGroup = i === first || s.d[i] !== s.d[i - 1];
+    const classes = [];
+    if (newGroup && i > first) classes.push('group-start');
+    const attr = classes.length ? " class='" + classes.join(' ') + "'" : '';
+    const date = newGroup ? dateLabel(p, s, i) : '';
+    return '<tr' + attr + "><td class='date-cell'><strong>" + date + '</strong></td><td>' +
+        p.periods[s.r[i]] + '</td>' + rateCells(s, i);
+}
+
+// --- Paged tables: only one page of rows is ever in the DOM ---
+const pages = {};
+
+function showPage(cls, type, page) {
+    const p = ratePayload[cls];
+    if (!p) return;
+    const n = p[type].d.length;
+    const last = Math.max(0, Math.ceil(n / PAGE_SIZE) - 1);
+    page = Math.min(Math.max(page, 0), last);
+    const key = cls + '-' + type;
+    if (pages[key] !== page) {
+        const start = page * PAGE_SIZE;
+        const end = Math.min(n, start + PAGE_SIZE);
+        const row = type === 'flat' ? flatRow : touRow;
+        let html = '';
+        for (let i = start; i < end; i++) html += row(p, i, start);
+        document.getElementById(key + '-rows').innerHTML = html;
+        pages[key] = page;
+    }
+    const pager = document.getElementById(key + '-pager');
+    if (n <= PAGE_SIZE) {
+        pager.innerHTML = '';
+        return;
+    }
+    pager.innerHTML =
+        '<button' + (page === 0 ? ' disabled' : '') + " onclick=\\"showPage('" + cls + "', '" + type + "', " + (page - 1) + ')">Newer</button>' +
+        '<button' + (page === last ? ' disabled' : '') + " onclick=\\"showPage('" + cls + "', '" + type + "', " + (page + 1) + ')">Older</button>' +
+        'Rows ' + (page * PAGE_SIZE + 1) + '&ndash;' + Math.min(n, (page + 1) * PAGE_SIZE) + ' of ' + n;
+}
+
+// The first page of every table is already in the markup; add the pagers.
+Object.keys(ratePayload).forEach(cls => {
+    pages[cls + '-flat'] = pages[cls + '-tou'] = 0;
+    showPage(cls, 'flat', 0);
+    showPage(cls, 'tou', 0);
+});
 
-    # Tabs, Toggles, Chart Logic, and Show More script
-    html += f"""
-<script>
 // --- Chart.js Integration ---
-const flatRatesData = {rates_json_str};
-
-function initCharts() {{
-    const classes = ['RS', 'RH', 'RA'];
-
-    classes.forEach(cls => {{
-        const ctx = document.getElementById('chart-' + cls);
-        if (!ctx) return;
-
-        const data = flatRatesData[cls] || [];
-
-        // Data is currently newest to oldest. Reverse it for chronological charting.
-        const chartData = [...data].reverse();
-
-        // For RH and RA, append the season to the date for the chart tooltip
-        const labels = chartData.map(d => (cls === 'RH' || cls === 'RA') ? d.date + ' (' + d.season + ')' : d.date);
-        const totalRates = chartData.map(d => d.total_rate);
-        const ptcRates = chartData.map(d => d.ptc_rate);
-        const distRates = chartData.map(d => d.distribution_rate);
-
-        new Chart(ctx, {{
-            data: {{
-                labels: labels,
-                datasets: [
-                    {{
-                        type: 'line',
-                        label: 'Total Rate Trend',
-                        data: totalRates,
-                        borderColor: '#1e293b', /* Crisp Dark Slate */
-                        backgroundColor: '#1e293b',
-                        borderWidth: 3,
-                        pointRadius: 4,
-                        fill: false, /* No background fill */
-                        tension: 0.2
-                    }},
-                    {{
-                        type: 'bar',
-                        label: 'Price to Compare (PTC)',
-                        data: ptcRates,
-                        backgroundColor: 'rgba(245, 158, 11, 0.8)', /* Warm Amber */
-                        borderColor: '#d97706',
-                        borderWidth: 1,
-                        stack: 'Stack 0',
-                        barPercentage: 0.5 /* Slims down the bar width */
-                    }},
-                    {{
-                        type: 'bar',
-                        label: 'Distribution',
-                        data: distRates,
-                        backgroundColor: 'rgba(59, 130, 246, 0.8)', /* Utility Blue */
-                        borderColor: '#2563eb',
-                        borderWidth: 1,
-                        stack: 'Stack 0',
-                        barPercentage: 0.5 /* Slims down the bar width */
-                    }}
-                ]
-            }},
-            options: {{
-                responsive: true,
-                maintainAspectRatio: false,
-                interaction: {{
-                    mode: 'index',
-                    intersect: false,
-                }},
-                plugins: {{
-                    legend: {{ position: 'bottom' }}
-                }},
-                scales: {{
-                    x: {{
-                        stacked: true, /* Enable bar stacking horizontally */
-                        ticks: {{
-                            maxTicksLimit: 12
-                        }}
-                    }},
-                    y: {{
-                        stacked: true, /* Enable bar stacking vertically */
-                        beginAtZero: true,
-                        title: {{ display: true, text: 'Cents per kWh (¢)' }}
-                    }}
-                }}
-            }}
-        }});
-    }});
-}}
-
-// Initialize charts after script loads
-window.addEventListener('DOMContentLoaded', initCharts);
+const charts = {};
+
+// Charts are created the first time their class's flat rates are shown.
+// Chart.js loads deferred, so a chart asked for before it has run waits for
+// DOMContentLoaded, which fires once deferred scripts have executed.
+function initChart(cls) {
+    if (charts[cls]) return;
+    if (!window.Chart) {
+        window.addEventListener('DOMContentLoaded', () => initChart(cls), { once: true });
+        return;
+    }
+    const ctx = document.getElementById('chart-' + cls);
+    if (!ctx) return;
+
+    // Chronological row indexes, downsampled at build time.
+    const p = ratePayload[cls];
+    const idx = p ? p.chart : [];
+    const column = name => idx.map(i => p.flat[name][i] / 100);
+
+    charts[cls] = new Chart(ctx, {
+        data: {
+            labels: idx.map(i => dateLabel(p, p.flat, i)),
+            datasets: [
+                {
+                    type: 'line',
+                    label: 'Total Rate Trend',
+                    data: column('t'),
+                    borderColor: '#1e293b', /* Crisp Dark Slate */
+                    backgroundColor: '#1e293b',
+                    borderWidth: 3,
+                    pointRadius: 4,
+                    fill: false, /* No background fill */
+                    tension: 0.2
+                },
+                {
+                    type: 'bar',
+                    label: 'Price to Compare (PTC)',
+                    data: column('p'),
+                    backgroundColor: 'rgba(245, 158, 11, 0.8)', /* Warm Amber */
+                    borderColor: '#d97706',
+                    borderWidth: 1,
+                    stack: 'Stack 0',
+                    barPercentage: 0.5 /* Slims down the bar width */
+                },
+                {
+                    type: 'bar',
+                    label: 'Distribution',
+                    data: column('x'),
+                    backgroundColor: 'rgba(59, 130, 246, 0.8)', /* Utility Blue */
+                    borderColor: '#2563eb',
+                    borderWidth: 1,
+                    stack: 'Stack 0',
+                    barPercentage: 0.5 /* Slims down the bar width */
+                }
+            ]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            interaction: {
+                mode: 'index',
+                intersect: false,
+            },
+            plugins: {
+                legend: { position: 'bottom' }
+            },
+            scales: {
+                x: {
+                    stacked: true, /* Enable bar stacking horizontally */
+                    ticks: {
+                        maxTicksLimit: 12
+                    }
+                },
+                y: {
+                    stacked: true, /* Enable bar stacking vertically */
+                    beginAtZero: true,
+                    title: { display: true, text: 'Cents per kWh (¢)' }
+                }
+            }
+        }
+    });
+}
 
 // --- UI Interaction Logic ---
 // Main Class Tabs
 const tabs = document.querySelectorAll('.tab');
 const sections = document.querySelectorAll('.section');
 
-tabs.forEach(tab => {{
-    tab.addEventListener('click', () => {{
+tabs.forEach(tab => {
+    tab.addEventListener('click', () => {
         tabs.forEach(t => t.classList.remove('active'));
         sections.forEach(s => s.classList.remove('active'));
         tab.classList.add('active');
         document.getElementById('section-' + tab.dataset.class).classList.add('active');
-    }});
-}});
+        if (document.getElementById(tab.dataset.class + '-flat').classList.contains('active')) {
+            initChart(tab.dataset.class);
+        }
+    });
+});
 tabs[0].click();
 
 // Sub-Tabs for Flat vs TOU
-function switchRateType(event, cls, type) {{
+function switchRateType(event, cls, type) {
     const section = document.getElementById('section-' + cls);
 
     // Update button states
@@ -328,13 +351,8 @@ function switchRateType(event, cls, type) {{
     // Update container visibility
     section.querySelectorAll('.rate-container').forEach(c => c.classList.remove('active'));
     document.getElementById(cls + '-' + type).classList.add('active');
-}}
-
-function showMore(btn){{
-    const table = btn.closest('table');
-    table.querySelectorAll('.extra-row').forEach(r => r.style.display = 'table-row');
-    btn.style.display = 'none';
-}}
+    if (type === 'flat') initChart(cls);
+}
 </script>
 <footer style="margin-top: 40px; font-size: 0.85em; color: #555;">
   <p>
@@ -352,14 +370,201 @@ function showMore(btn){{
 </body>
 </html>
 """
-    return html
+
+def lttb(xs, ys, threshold):
+    """Indices of the points kept by largest-triangle-three-buckets: the
+    first and last, plus one per bucket, picked to preserve the shape."""
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    keep = [0]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third corner of the triangle
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = sum(xs[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(ys[next_start:next_end]) / (next_end - next_start)
+
+        best, best_area = None, -1.0
+        for j in range(int(i * every) + 1, int((i + 1) * every) + 1):
+            area = abs((xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a]))
+            if area > best_area:
+                best, best_area = j, area
+        keep.append(best)
+        a = best
+    keep.append(n - 1)
+    return keep
+
+def hundredths(rate):
+    """A ¢/kWh rate as integer hundredths of a cent, rounded exactly as the
+    tables' :.2f always has (17.595 shows as 17.59, not 17.60)."""
+    return round(float(f"{rate:.2f}") * 100)
+
+def class_payload(flat, tou, seasonal):
+    """One class's rates as compact columns, newest first like the tables:
+    d = days after epoch, s = season index, r = period index, and t / p / x =
+    total / PTC / distribution in hundredths of a cent. chart holds the flat
+    row indexes plotted, chronological and downsampled to CHART_POINTS."""
+    ordinals = [r.effective_date.toordinal() for r in flat + tou]
+    epoch = min(ordinals, default=date.today().toordinal())
+    seasons, periods = {}, {}
+
+    def columns(rows, tou):
+        cols = {"d": [], "s": [], "t": [], "p": [], "x": []}
+        if tou:
+            cols["r"] = []
+        for r in rows:
+            cols["d"].append(r.effective_date.toordinal() - epoch)
+            cols["s"].append(seasons.setdefault(r.season, len(seasons)))
+            if tou:
+                cols["r"].append(periods.setdefault(r.period, len(periods)))
+            cols["t"].append(hundredths(r.total))
+            # PTC rounded to 4 decimal places to avoid floating point issues
+            cols["p"].append(hundredths(round(r.supply + r.transmission, 4)))
+            cols["x"].append(hundredths(r.distribution))
+        return cols
+
+    flat_cols = columns(flat, False)
+    tou_cols = columns(tou, True)
+    n = len(flat)
+    chronological = range(n - 1, -1, -1)
+    keep = lttb([flat_cols["d"][i] for i in chronological], [flat_cols["t"][i] for i in chronological], CHART_POINTS)
+    return {
+        "epoch": date.fromordinal(epoch).isoformat(),
+        "seasonal": seasonal,
+        "seasons": list(seasons),
+        "periods": list(periods),
+        "flat": flat_cols,
+        "tou": tou_cols,
+        "chart": [n - 1 - i for i in keep],
+    }
+
+def date_label(payload, cols, i):
+    """Display date of row i, as the page script renders it."""
+    epoch = date.fromisoformat(payload["epoch"]).toordinal()
+    label = date.fromordinal(epoch + cols["d"][i]).isoformat()
+    return f"{label} ({payload['seasons'][cols['s'][i]]})" if payload["seasonal"] else label
+
+def first_page(payload, tou):
+    """Server-side rows for the first table page; the script renders the rest
+    from the payload with the same markup."""
+    cols = payload["tou" if tou else "flat"]
+    for i in range(min(MAX_ROWS, len(cols["d"]))):
+        rates = (cols["t"][i] / 100, cols["p"][i] / 100, cols["x"][i] / 100)
+        if not tou:
+            yield FLAT_ROW(date_label(payload, cols, i), *rates)
+            continue
+        # Group rows by date: a top border and the date only on a group's first row
+        is_new_group = i == 0 or cols["d"][i] != cols["d"][i - 1]
+        class_attr = " class='group-start'" if is_new_group and i > 0 else ""
+        display_date = date_label(payload, cols, i) if is_new_group else ""
+        yield TOU_ROW(class_attr, display_date, payload["periods"][cols["r"][i]], *rates)
+
+def pager(cls, rate_type, rows):
+    note = NOSCRIPT_NOTE(MAX_ROWS, rows) if rows > MAX_ROWS else ""
+    return TABLE_END(cls, rate_type, note)
+
+def render_class(cls, flat, tou):
+    """(section markup, payload JSON) for one class's grouped rates — the
+    page is built from these, so a class can be re-rendered on its own."""
+    seasonal = any(r.season != "All" for r in flat + tou)
+    payload = class_payload(flat, tou, seasonal)
+
+    # Toggle buttons, then the flat rates container with its Chart.js canvas
+    section = [SECTION_START(cls, RATE_DEFINITIONS.get(cls, cls))]
+    section += first_page(payload, tou=False)
+    section.append(pager(cls, "flat", len(payload["flat"]["d"])))
+
+    # --- TOU rates Container ---
+    section.append(TOU_START(cls))
+    section += first_page(payload, tou=True)
+    section.append(pager(cls, "tou", len(payload["tou"]["d"])))
+
+    section.append(SECTION_END)
+    return "".join(section), json.dumps(payload, separators=(",", ":"))
+
+def render_page(classes):
+    """Yield the page as a sequence of fragments, in order, from a
+    {class: render_class()} dict. The payload goes out one class at a time,
+    so the full document never has to exist as a single string."""
+    yield PAGE_HEAD
+
+    # Tab buttons
+    for cls in CLASSES:
+        yield TAB(cls, RATE_DEFINITIONS.get(cls, cls))
+    yield '</div>\n'
+
+    # Sections per class
+    for cls in CLASSES:
+        yield classes[cls][0]
+
+    # The columnar payload both the tables and the charts render from
+    yield PAGE_SCRIPT_START(MAX_ROWS)
+    yield "{"
+    for i, cls in enumerate(CLASSES):
+        yield ("," if i else "") + json.dumps(cls) + ":" + classes[cls][1]
+    yield "}"
+    yield PAGE_SCRIPT_END
+
+def render_html(flat_rates, tou_rates):
+    """Yield the page as a sequence of fragments, in order."""
+    return render_page({cls: render_class(cls, flat_rates.get(cls, []), tou_rates.get(cls, []))
+                        for cls in CLASSES})
+
+RAW_BLOCKS = ("<pre", "<textarea")  # whitespace is content inside these
+
+def minify_line(line, raw):
+    """(minified line or None to drop it, raw block still open)."""
+    if raw:
+        return line, None if f"</{raw}" in line else raw
+    stripped = line.strip()
+    if not stripped or stripped.startswith("// "):
+        return None, None
+    for tag in RAW_BLOCKS:
+        if tag in stripped and f"</{tag[1:]}" not in stripped:
+            raw = tag[1:]
+    return stripped, raw
+
+def minified(fragments):
+    """The page's lines with indentation, blank lines and whole-line //
+    comments stripped, as the fragments stream by. Line breaks are kept, so
+    inline text and the page script keep their meaning."""
+    pending = []  # pieces of the line not yet ended
+    raw = None
+    for fragment in fragments:
+        lines = fragment.split("\n")
+        if len(lines) == 1:
+            pending.append(fragment)
+            continue
+        pending.append(lines[0])
+        for line in ["".join(pending), *lines[1:-1]]:
+            line, raw = minify_line(line, raw)
+            if line is not None:
+                yield line + "\n"
+        pending = [lines[-1]]
+    line, raw = minify_line("".join(pending), raw)
+    if line is not None:
+        yield line + "\n"
+
+@profiling.timed("html_rates.generate_html")
+def generate_html(flat_rates, tou_rates):
+    return "".join(minified(render_html(flat_rates, tou_rates)))
+
+def write_html(flat_rates, tou_rates, output_html=OUTPUT_HTML):
+    """Stream the minified page straight to disk through a buffered file."""
+    with profiling.stage("html_rates.write_html"):
+        write_page(render_html(flat_rates, tou_rates), output_html)
+
+def write_page(fragments, output_html=OUTPUT_HTML):
+    with open(output_html, "w", encoding="utf-8") as f:
+        f.writelines(minified(fragments))
 
 def main():
     flat_rates = read_csv(RATES_CSV)
     tou_rates = read_csv(RATES_TOU_CSV, tou=True)
-
-    html = generate_html(flat_rates, tou_rates)
-    Path(OUTPUT_HTML).write_text(html, encoding="utf-8")
+    write_html(flat_rates, tou_rates)
     print(f"Static HTML generated at {OUTPUT_HTML}")
 
 if __name__ == "__main__":
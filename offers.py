@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+offers.py — score third-party supplier offers against the Price to Compare.
+
+An alternative supplier replaces the Price to Compare (PTC: Supply +
+Transmission, as on the rates page); distribution is billed the same either
+way, so only that part of the bill is compared. Offers are read from a CSV:
+
+    Offer, Supplier, Rate, Teaser Rate, Teaser Months, Variable Rate, Monthly Fee, Term Months
+
+Rates are ¢/kWh and fees are cents. Term Months is the whole contract, as
+offers are quoted, teaser included: month m is charged the Teaser Rate while
+m < Teaser Months, then Rate while m < Term Months, then the Variable Rate
+the contract rolls over to. A blank Rate means the offer goes variable
+straight after its teaser; a blank Variable Rate means the customer drops
+back to the PTC when the term ends. A blank Term Months means the contract
+is just the teaser. The monthly fee applies for the Term Months.
+
+Usage profiles are a CSV of kWh per calendar month:
+
+    Profile, Class, Jan, Feb, ..., Dec
+
+Every offer is priced for every profile over the same horizon (--months,
+from --start), against the PTC of the profile's class from build_tables(),
+day-averaged per month. Each profile keeps prefix sums of its kWh and of its
+PTC cost by month, so an offer's cost is a handful of array reads per
+segment (teaser, fixed, variable), whatever the horizon — a catalog of
+thousands of offers against many profiles is a few million array reads.
+
+    python3 offers.py offers.csv profiles.csv --months 24 --top 10
+"""
+
+import argparse
+import csv
+import sys
+from array import array
+from datetime import date, timedelta
+from itertools import accumulate
+
+import bills
+import csv_rates
+
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+NAN = float("nan")
+
+
+def add_months(day, n):
+    month = day.month - 1 + n
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def number(value, default=None):
+    value = (value or "").strip()
+    return default if value == "" else float(value)
+
+
+def load_offers(path):
+    offers = []
+    with open(path, newline="") as f:
+        for r in csv.DictReader(f):
+            teaser_rate = number(r.get("Teaser Rate"))
+            teaser_months = int(number(r.get("Teaser Months"), 0)) if teaser_rate is not None else 0
+            term_months = int(number(r.get("Term Months"), teaser_months))
+            if teaser_months > term_months:
+                raise ValueError(f"offer {r['Offer']!r}: Teaser Months {teaser_months} "
+                                 f"is longer than Term Months {term_months}")
+            offers.append({
+                "offer": r["Offer"],
+                "supplier": r.get("Supplier", ""),
+                "rate": number(r.get("Rate")),
+                "teaser_rate": teaser_rate,
+                "teaser_months": teaser_months,
+                "variable_rate": number(r.get("Variable Rate")),
+                "monthly_fee": number(r.get("Monthly Fee"), 0.0),
+                "term_months": term_months,
+            })
+    return offers
+
+
+def load_profiles(path):
+    with open(path, newline="") as f:
+        return [{"profile": r["Profile"], "class": r["Class"], "kwh": [float(r[m]) for m in MONTHS]}
+                for r in csv.DictReader(f)]
+
+
+def ptc_by_month(timeline, cls, start, months):
+    """Day-weighted average PTC (¢/kWh) for each of months from start; NaN
+    for a month with no rate in effect on any of its days."""
+    out = array("d")
+    for m in range(months):
+        day, end = add_months(start, m), add_months(start, m + 1)
+        total = days = 0
+        while day < end:
+            rates = timeline.flat_on(cls, day)
+            if rates is not None:
+                total += round(rates[1] + rates[2], 4)
+                days += 1
+            day += timedelta(days=1)
+        out.append(total / days if days else NAN)
+    return out
+
+
+class Profile:
+    """One usage profile laid out over the horizon, with prefix sums."""
+
+    def __init__(self, profile, start, months, ptc):
+        self.name = profile["profile"]
+        self.cls = profile["class"]
+        kwh = [profile["kwh"][add_months(start, m).month - 1] for m in range(months)]
+        self.kwh = array("d", accumulate(kwh, initial=0.0))
+        self.ptc = array("d", accumulate((k * p for k, p in zip(kwh, ptc)), initial=0.0))
+        self.months = months
+
+    def offer_cost(self, offer):
+        """Cost (cents) of one offer over the horizon."""
+        n = self.months
+        kwh, ptc = self.kwh, self.ptc
+        teaser_end = min(offer["teaser_months"], n)
+        term_end = min(offer["term_months"], n)
+        fixed_end = term_end if offer["rate"] is not None else teaser_end
+
+        cost = offer["monthly_fee"] * term_end
+        if teaser_end:
+            cost += offer["teaser_rate"] * kwh[teaser_end]
+        if fixed_end > teaser_end:
+            cost += offer["rate"] * (kwh[fixed_end] - kwh[teaser_end])
+        if n > fixed_end:
+            if offer["variable_rate"] is None:
+                cost += ptc[n] - ptc[fixed_end]
+            else:
+                cost += offer["variable_rate"] * (kwh[n] - kwh[fixed_end])
+        return cost
+
+
+def score(offers, profiles, start, months, timeline=None):
+    """Savings of every offer vs the PTC for every profile, best first per
+    profile. Positive savings mean the offer is cheaper."""
+    if timeline is None:
+        timeline = bills.RateTimeline(*csv_rates.build_tables(add_months(start, months)))
+    ptc = {}
+    laid_out = []
+    for p in profiles:
+        if p["class"] not in ptc:
+            ptc[p["class"]] = ptc_by_month(timeline, p["class"], start, months)
+        laid_out.append(Profile(p, start, months, ptc[p["class"]]))
+
+    results = []
+    for profile in laid_out:
+        baseline = profile.ptc[months]
+        scored = []
+        for offer in offers:
+            cost = profile.offer_cost(offer)
+            scored.append({
+                "profile": profile.name,
+                "class": profile.cls,
+                "offer": offer["offer"],
+                "supplier": offer["supplier"],
+                "kwh": profile.kwh[months],
+                "cost": cost,
+                "ptc_cost": baseline,
+                "savings": baseline - cost,
+            })
+        scored.sort(key=lambda r: (r["savings"] != r["savings"], -r["savings"]))  # NaN last
+        results.append(scored)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank supplier offers against the Price to Compare.")
+    parser.add_argument("offers", help="offer catalog CSV")
+    parser.add_argument("profiles", help="usage profiles CSV (Profile, Class, Jan..Dec)")
+    parser.add_argument("--start", type=date.fromisoformat, default=add_months(date.today(), 1),
+                        help="first contract month (default: next month)")
+    parser.add_argument("--months", type=int, default=12, help="horizon in months")
+    parser.add_argument("--top", type=int, help="offers to list per profile (default: all)")
+    args = parser.parse_args()
+
+    start = args.start.replace(day=1)
+    results = score(load_offers(args.offers), load_profiles(args.profiles), start, args.months)
+
+    w = csv.writer(sys.stdout, lineterminator="\n")
+    w.writerow(["Profile", "Class", "Rank", "Offer", "Supplier", "kWh", "Offer Cost", "PTC Cost", "Savings"])
+    for scored in results:
+        for rank, r in enumerate(scored[:args.top], 1):
+            w.writerow([r["profile"], r["class"], rank, r["offer"], r["supplier"], round(r["kwh"], 1),
+                        round(r["cost"] / 100, 2), round(r["ptc_cost"] / 100, 2), round(r["savings"] / 100, 2)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+profiling.py — opt-in stage timings and hot-path counters for the build.
+
+Off by default. Everything here checks ENABLED first, so instrumented code
+pays one attribute lookup per call when profiling is off.
+
+    profiling.enable()
+    ... run the build ...
+    profiling.write_report("output/profile.json")
+
+The report holds, per stage, the number of calls, total wall time, net
+allocated memory and peak traced memory (via tracemalloc), plus the
+counters recorded with count(): as_of calls, rows scanned, timeline dates
+per class, rows emitted and so on.
+"""
+
+import functools
+import json
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+ENABLED = False
+
+counters = Counter()
+stages = {}
+_local = threading.local()
+
+
+def enable():
+    global ENABLED
+    ENABLED = True
+    counters.clear()
+    stages.clear()
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def count(name, n=1):
+    if ENABLED:
+        counters[name] += n
+
+
+@contextmanager
+def stage(name):
+    """Time a block and track its allocations. Stages may nest; an outer
+    stage's peak includes the peaks of the stages inside it."""
+    if not ENABLED:
+        yield
+        return
+
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    current, peak = tracemalloc.get_traced_memory()
+    if stack:
+        stack[-1]["inner_peak"] = max(stack[-1]["inner_peak"], peak)
+    tracemalloc.reset_peak()
+    frame = {"inner_peak": 0, "start_mem": current}
+    stack.append(frame)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stack.pop()
+        end_mem, peak = tracemalloc.get_traced_memory()
+        peak = max(peak, frame["inner_peak"])
+        if stack:
+            stack[-1]["inner_peak"] = max(stack[-1]["inner_peak"], peak)
+
+        s = stages.setdefault(name, {"calls": 0, "seconds": 0.0, "allocated_kib": 0.0, "peak_kib": 0.0})
+        s["calls"] += 1
+        s["seconds"] += elapsed
+        s["allocated_kib"] += (end_mem - frame["start_mem"]) / 1024
+        s["peak_kib"] = max(s["peak_kib"], (peak - frame["start_mem"]) / 1024)
+
+
+def timed(name):
+    """Decorator form of stage()."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def report():
+    return {
+        "stages": {
+            name: {k: round(v, 6) if isinstance(v, float) else v for k, v in s.items()}
+            for name, s in stages.items()
+        },
+        "counters": dict(sorted(counters.items())),
+    }
+
+
+def write_report(path):
+    with open(path, "w") as f:
+        json.dump(report(), f, indent=2)
+
+
+def print_report():
+    r = report()
+    for name, s in r["stages"].items():
+        print(f"  {name:32} {s['calls']:6} calls {s['seconds'] * 1000:10.2f} ms {s['peak_kib']:10.1f} KiB peak")
+    for name, n in r["counters"].items():
+        print(f"  {name:48} {n:12}")
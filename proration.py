@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+proration.py — prorated rates for billing cycles that span rate changes.
+
+A bill whose cycle crosses an effective date is prorated by days: the
+cycle's rate is the average of the daily rates over [start, end). This
+materializes a dense daily rate calendar per class and period (flat, or each
+TOU period) from the csv_rates components — via ratebook.RateBook, so the
+season of each day is applied as in build_tables() — and keeps prefix sums
+of every column. The average over any cycle is then two array reads and a
+division, however long the cycle.
+
+    cal = RateCalendar(date(2020, 1, 1), date(2027, 1, 1))
+    cal.average(starts, ends, "RH")              # flat total, per cycle
+    cal.average(starts, ends, "RH", "Peak", "supply")
+
+Cycles with any day that has no rate in effect, or that fall outside the
+calendar, get NaN.
+
+    python3 proration.py cycles.csv --class RH    # Account, Start, End columns
+"""
+
+import argparse
+import csv
+import sys
+from array import array
+from datetime import date, timedelta
+from itertools import accumulate
+
+import csv_rates
+from ratebook import RateBook
+from records import parse_date
+
+COLUMNS = ["distribution", "supply", "transmission", "total"]
+NAN = float("nan")
+
+
+def prefix_sums(values):
+    """[0, v0, v0+v1, ...] with NaN days counted as 0."""
+    return array("d", accumulate((0.0 if v != v else v for v in values), initial=0.0))
+
+
+def missing_counts(values):
+    """Prefix count of NaN days, to tell a partly unpriced cycle apart."""
+    return array("l", accumulate((1 if v != v else 0 for v in values), initial=0))
+
+
+class RateCalendar:
+    def __init__(self, start, end, book=None, classes=None):
+        """Daily rates for every day in [start, end)."""
+        book = book or RateBook()
+        self.start = start.toordinal()
+        self.days = (end - start).days
+        days = [start + timedelta(days=i) for i in range(self.days)]
+
+        self.daily = {}
+        self.sums = {}
+        self.missing = {}
+        for cls in classes or csv_rates.CLASSES:
+            for period in [None] + csv_rates.TOU_PERIODS:
+                rates = book.lookup(days, cls, period)
+                self.daily[(cls, period)] = rates
+                self.sums[(cls, period)] = {col: prefix_sums(rates[col]) for col in COLUMNS}
+                self.missing[(cls, period)] = missing_counts(rates["total"])
+
+    @classmethod
+    def for_data(cls, end=None, book=None):
+        """A calendar from the first filed effective date through end
+        (default: a year past today or the last filed row, whichever is later)."""
+        components = csv_rates.load_components()
+        book = book or RateBook(components)
+        filed = [r.effective_date for c in components for r in c]
+        start = min(filed, default=date.today())
+        if end is None:
+            end = max(filed + [date.today()]) + timedelta(days=366)
+        return cls(start, end, book)
+
+    def average(self, starts, ends, cls, period=None, column="total"):
+        """Day-weighted average rate over each [start, end) cycle."""
+        sums = self.sums[(cls, period)][column]
+        missing = self.missing[(cls, period)]
+        out = array("d")
+        for start, end in zip(starts, ends):
+            s = start.toordinal() - self.start
+            e = end.toordinal() - self.start
+            if s < 0 or e > self.days or e <= s or missing[e] != missing[s]:
+                out.append(NAN)
+            else:
+                out.append((sums[e] - sums[s]) / (e - s))
+        return out
+
+    def charges(self, starts, ends, kwh, cls, period=None):
+        """Prorated charge (cents) for each cycle's kWh."""
+        return array("d", (a * k for a, k in zip(self.average(starts, ends, cls, period), kwh)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prorated rates for billing cycles.")
+    parser.add_argument("cycles", help="CSV with Account, Start, End columns (End exclusive)")
+    parser.add_argument("--class", dest="cls", default="RS", choices=csv_rates.CLASSES)
+    parser.add_argument("--period", choices=csv_rates.TOU_PERIODS, help="a TOU period instead of flat")
+    args = parser.parse_args()
+
+    with open(args.cycles, newline="") as f:
+        rows = list(csv.DictReader(f))
+    starts = [parse_date(r["Start"]) for r in rows]
+    ends = [parse_date(r["End"]) for r in rows]
+
+    calendar = RateCalendar.for_data(end=max(ends, default=date.today()) + timedelta(days=1))
+    averages = {col: calendar.average(starts, ends, args.cls, args.period, col) for col in COLUMNS}
+
+    w = csv.writer(sys.stdout, lineterminator="\n")
+    w.writerow(["Account", "Start", "End", "Distribution Rate", "Supply Rate", "Transmission Rate", "Total Rate"])
+    for i, r in enumerate(rows):
+        w.writerow([r["Account"], r["Start"], r["End"], *(round(averages[col][i], 4) for col in COLUMNS)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+rate_loadtest.py — load-test a running rate_server.py.
+
+Opens --connections keep-alive connections and sends --requests GET /rate
+queries in total, spread over random classes, dates and periods, then
+reports p50 / p99 latency and requests per second.
+
+    python3 rate_server.py --port 8080 &
+    python3 rate_loadtest.py --port 8080 --requests 20000 --connections 32
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import date, timedelta
+
+import csv_rates
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+
+def random_targets(n, start, end, seed=0):
+    rnd = random.Random(seed)
+    span = (end - start).days
+    periods = [None] + csv_rates.TOU_PERIODS
+    targets = []
+    for _ in range(n):
+        query = f"class={rnd.choice(csv_rates.CLASSES)}&date={start + timedelta(days=rnd.randrange(span))}"
+        period = rnd.choice(periods)
+        if period:
+            query += "&period=" + period.replace(" ", "%20")
+        targets.append(f"/rate?{query}")
+    return targets
+
+
+async def client(host, port, targets, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for target in targets:
+            start = time.perf_counter()
+            writer.write(f"GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run(host, port, requests, connections, start, end):
+    targets = random_targets(requests, start, end)
+    latencies = []
+    statuses = {}
+    began = time.perf_counter()
+    await asyncio.gather(*(
+        client(host, port, targets[i::connections], latencies, statuses) for i in range(connections)
+    ))
+    elapsed = time.perf_counter() - began
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "statuses": statuses,
+        "seconds": elapsed,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test rate_server.py.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--start", type=date.fromisoformat, default=date(2025, 1, 1))
+    parser.add_argument("--end", type=date.fromisoformat, default=date.today())
+    args = parser.parse_args()
+
+    r = asyncio.run(run(args.host, args.port, args.requests, args.connections, args.start, args.end))
+    print(f"{r['requests']} requests in {r['seconds']:.2f}s over {args.connections} connections")
+    print(f"  {r['rps']:,.0f} req/s   p50 {r['p50_ms']:.2f} ms   p99 {r['p99_ms']:.2f} ms")
+    print(f"  statuses: {r['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+rate_server.py — local HTTP service answering point-in-time rate queries.
+
+The component files are loaded into csv_rates' in-memory as-of index once,
+and every query is answered from it directly — no scripts, no re-parsing
+output/rates.json:
+
+    GET  /rate?class=RH&date=2025-11-14                  flat rate
+    GET  /rate?class=RH&date=2025-11-14&period=Peak      TOU rate
+         (&season=Winter overrides the calendar season)
+    POST /rates   [{"class": "RH", "date": "2025-11-14", "period": "Peak"}, ...]
+    GET  /health
+
+Each answer has the season, distribution, supply and transmission
+components and the total, rounded exactly as csv_rates.build_tables() does.
+
+data/ is polled for changes; a changed file triggers a rebuild of the index
+in a worker thread, and the new snapshot is swapped in with a single
+assignment. Requests already running keep the snapshot they started with,
+and a data file that fails to load leaves the old snapshot in place.
+
+    python3 rate_server.py --port 8080
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import date
+from urllib.parse import parse_qsl, urlsplit
+
+import csv_rates
+
+RELOAD_INTERVAL = 1.0  # seconds between data/ polls
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           500: "Internal Server Error"}
+
+
+class QueryError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Snapshot:
+    """Indexed component files as of one load of data/."""
+
+    def __init__(self):
+        self.components = csv_rates.load_components()
+        dist = self.components[1]
+        self.seasonal = {cls: csv_rates.is_seasonal(dist, cls) for cls in {r.cls for r in dist}}
+        self.loaded_at = time.time()
+
+    def query(self, cls, target_date, period=None, season=None):
+        riders, dist, trans, supply, supply_tou = self.components
+        if cls not in self.seasonal:
+            raise QueryError(404, f"unknown class {cls!r}")
+        if period is not None and period not in csv_rates.TOU_PERIODS:
+            raise QueryError(404, f"unknown period {period!r}")
+        if season is None:
+            season = csv_rates.get_season(target_date) if self.seasonal[cls] else "All"
+
+        distribution = csv_rates.distribution_total(dist, riders, target_date, cls, season)
+        if period is None:
+            rest = csv_rates.flat_components(supply, trans, target_date, cls)
+        else:
+            rest = csv_rates.tou_components(supply_tou, trans, target_date, cls, period)
+        if distribution is None or rest is None:
+            raise QueryError(404, f"no {cls} {season} rate in effect on {target_date}")
+
+        distribution = round(distribution, 4)
+        supply_rate, transmission_rate = rest
+        return {
+            "class": cls,
+            "date": target_date.isoformat(),
+            "season": season,
+            "period": period,
+            "distribution": distribution,
+            "supply": supply_rate,
+            "transmission": transmission_rate,
+            "total": round(distribution + supply_rate + transmission_rate, 4),
+        }
+
+
+def data_signature():
+    """(name, mtime, size) for every data file — changes when any file does."""
+    sig = []
+    for path in sorted(csv_rates.DATA.glob("*.csv")):
+        st = path.stat()
+        sig.append((path.name, st.st_mtime_ns, st.st_size))
+    return tuple(sig)
+
+
+class RateService:
+    def __init__(self):
+        self.signature = data_signature()
+        self.snapshot = Snapshot()
+        self.reloads = 0
+        self.failed = None  # signature of data/ that last failed to load
+
+    async def watch(self, interval=RELOAD_INTERVAL):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            # Anything can go wrong reading files mid-save (a half-written
+            # row, a file deleted between listing and stat); none of it may
+            # take the server down.
+            signature = None
+            try:
+                signature = await loop.run_in_executor(None, data_signature)
+                if signature in (self.signature, self.failed):
+                    continue
+                snapshot = await loop.run_in_executor(None, Snapshot)
+            except Exception as e:
+                if signature != self.failed:
+                    print(f"Reload failed, keeping previous snapshot: {e!r}")
+                self.failed = signature
+                continue
+            self.snapshot, self.signature = snapshot, signature
+            self.reloads += 1
+            print(f"Reloaded {csv_rates.DATA} (reload #{self.reloads})")
+
+    def answer(self, q, snapshot):
+        if not isinstance(q, dict):
+            raise QueryError(400, "each query must be a JSON object")
+        try:
+            cls = q["class"]
+            target_date = date.fromisoformat(q["date"])
+        except KeyError as e:
+            raise QueryError(400, f"missing {e.args[0]!r}")
+        except (TypeError, ValueError):
+            raise QueryError(400, f"bad date {q.get('date')!r}")
+        for key in ("class", "period", "season"):
+            if q.get(key) is not None and not isinstance(q[key], str):
+                raise QueryError(400, f"{key!r} must be a string")
+        return snapshot.query(cls, target_date, q.get("period"), q.get("season"))
+
+    def handle(self, method, target, body):
+        """(status, payload) for one request."""
+        url = urlsplit(target)
+        snapshot = self.snapshot  # one snapshot for the whole request
+        try:
+            if url.path == "/health":
+                return 200, {"loaded_at": snapshot.loaded_at, "reloads": self.reloads}
+            if url.path == "/rate":
+                if method != "GET":
+                    raise QueryError(405, "use GET")
+                return 200, self.answer(dict(parse_qsl(url.query)), snapshot)
+            if url.path == "/rates":
+                if method != "POST":
+                    raise QueryError(405, "use POST")
+                try:
+                    queries = json.loads(body)
+                except ValueError:
+                    raise QueryError(400, "body must be a JSON list of queries")
+                if not isinstance(queries, list):
+                    raise QueryError(400, "body must be a JSON list of queries")
+                results = []
+                for q in queries:
+                    try:
+                        results.append(self.answer(q, snapshot))
+                    except QueryError as e:
+                        results.append({"error": str(e)})
+                    except Exception as e:  # one bad query must not lose the batch
+                        print(f"Query {q!r} failed: {e!r}")
+                        results.append({"error": "internal error"})
+                return 200, results
+            raise QueryError(404, f"no route {url.path}")
+        except QueryError as e:
+            return e.status, {"error": str(e)}
+        except Exception as e:  # answer the request rather than drop the connection
+            print(f"{method} {target} failed: {e!r}")
+            return 500, {"error": "internal error"}
+
+    async def serve_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = self.handle(method, target, body)
+                data = json.dumps(payload).encode()
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host, port):
+    service = RateService()
+    server = await asyncio.start_server(service.serve_connection, host, port)
+    print(f"Serving rates from {csv_rates.DATA} on http://{host}:{port}")
+    async with server:
+        await asyncio.gather(server.serve_forever(), service.watch())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve point-in-time rate queries over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
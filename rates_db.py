@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+rates_db.py — export the component files and rate timelines to SQLite.
+
+output/rates.sqlite holds:
+
+    riders, distribution_base, transmission, supply, supply_tou
+        the data/*.csv files as read (seq is the row's position in the file)
+    flat_rates   class, season, effective_date, distribution, supply,
+                 transmission, total, valid_until
+    tou_rates    the same plus period
+    classes, periods
+        the keys the as-of views iterate over
+    as_of        one row, the date the *_as_of views answer for
+
+valid_until is the next effective date for the same class (and period), or
+NULL for the rate in effect now. Rates are indexed on (class, season, period,
+effective_date), so an as-of lookup is one index seek:
+
+    SELECT * FROM tou_rates
+    WHERE class = 'RS' AND period = 'Peak' AND effective_date <= '2021-07-04'
+    ORDER BY effective_date DESC LIMIT 1;
+
+    UPDATE as_of SET day = '2021-07-04';
+    SELECT * FROM flat_as_of;               -- every class's rate on that day
+
+Updates work like build_cache.py: if every data file only had rows
+appended, just those rows are inserted, and only rate rows on or after the
+earliest appended effective date are replaced. Anything else rebuilds
+the tables. Either way the update is one transaction.
+
+    python3 rates_db.py          # or: python3 build.py --sqlite
+"""
+
+import argparse
+import json
+import sqlite3
+from datetime import date
+from pathlib import Path
+
+import build_cache
+import csv_rates
+import records
+
+DATABASE = "rates.sqlite"  # in csv_rates.OUTPUT, looked up at call time
+DB_VERSION = 1
+
+# Component file -> (table, record type, indexed columns)
+COMPONENTS = {
+    "riders.csv": ("riders", records.Rider, ("effective_date",)),
+    "distribution_base.csv": ("distribution_base", records.DistributionBase,
+                              ("class", "season", "effective_date")),
+    "transmission.csv": ("transmission", records.Transmission, ("class", "effective_date")),
+    "supply.csv": ("supply", records.Supply, ("effective_date",)),
+    "supply_tou.csv": ("supply_tou", records.SupplyTou, ("period", "effective_date")),
+}
+
+RATE_COLUMNS = "distribution REAL, supply REAL, transmission REAL, total REAL, valid_until TEXT"
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS build_state (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS flat_rates (
+    class TEXT NOT NULL, season TEXT NOT NULL, effective_date TEXT NOT NULL, {RATE_COLUMNS},
+    PRIMARY KEY (class, effective_date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS tou_rates (
+    class TEXT NOT NULL, season TEXT NOT NULL, period TEXT NOT NULL, effective_date TEXT NOT NULL,
+    {RATE_COLUMNS},
+    PRIMARY KEY (class, period, effective_date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS flat_rates_season ON flat_rates (class, season, effective_date);
+CREATE INDEX IF NOT EXISTS tou_rates_season ON tou_rates (class, season, period, effective_date);
+CREATE TABLE IF NOT EXISTS classes (class TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS periods (period TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS as_of (day TEXT NOT NULL);
+CREATE VIEW IF NOT EXISTS flat_as_of AS
+    SELECT f.* FROM as_of a CROSS JOIN classes c CROSS JOIN flat_rates f
+    WHERE f.class = c.class AND f.effective_date = (
+        SELECT max(effective_date) FROM flat_rates
+        WHERE class = c.class AND effective_date <= a.day);
+CREATE VIEW IF NOT EXISTS tou_as_of AS
+    SELECT t.* FROM as_of a CROSS JOIN classes c CROSS JOIN periods p CROSS JOIN tou_rates t
+    WHERE t.class = c.class AND t.period = p.period AND t.effective_date = (
+        SELECT max(effective_date) FROM tou_rates
+        WHERE class = c.class AND period = p.period AND effective_date <= a.day);
+"""
+# (CROSS JOIN fixes the join order: one primary-key seek per class/period
+# instead of a scan of the rate table.)
+
+# Rows after the splice point, and the last row before it, get their
+# valid_until from the next row of the same key.
+VALID_UNTIL = {
+    "flat_rates": """
+        UPDATE flat_rates SET valid_until = (
+            SELECT min(n.effective_date) FROM flat_rates n
+            WHERE n.class = flat_rates.class AND n.effective_date > flat_rates.effective_date)
+        WHERE valid_until IS NULL OR valid_until >= ?""",
+    "tou_rates": """
+        UPDATE tou_rates SET valid_until = (
+            SELECT min(n.effective_date) FROM tou_rates n
+            WHERE n.class = tou_rates.class AND n.period = tou_rates.period
+            AND n.effective_date > tou_rates.effective_date)
+        WHERE valid_until IS NULL OR valid_until >= ?""",
+}
+
+
+def columns(record):
+    return ["class" if f == "cls" else f for f in record._fields]
+
+
+def component_schema():
+    statements = []
+    for table, record, indexed in COMPONENTS.values():
+        cols = ", ".join(f"{c} {'TEXT' if c in ('effective_date', 'class', 'season', 'period') else 'REAL'}"
+                         for c in columns(record))
+        statements.append(f"CREATE TABLE IF NOT EXISTS {table} (seq INTEGER PRIMARY KEY, {cols});")
+        statements.append(f"CREATE INDEX IF NOT EXISTS {table}_as_of ON {table} ({', '.join(indexed)});")
+    return "\n".join(statements)
+
+
+def encode(row):
+    return (row[0].isoformat(), *row[1:])
+
+
+def database_file():
+    return csv_rates.OUTPUT / DATABASE
+
+
+def connect(path=None):
+    """Open the database, starting over if it was written by another schema
+    version."""
+    path = Path(path or database_file())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, isolation_level=None)
+    if load_state(conn).get("version") not in (None, DB_VERSION):
+        conn.close()
+        path.unlink()
+        conn = sqlite3.connect(path, isolation_level=None)
+    conn.executescript(SCHEMA + component_schema())
+    return conn
+
+
+def load_state(conn):
+    try:
+        return {k: json.loads(v) for k, v in conn.execute("SELECT key, value FROM build_state")}
+    except sqlite3.OperationalError:  # a new database
+        return {}
+
+
+def insert_components(conn, components, start_rows):
+    """Insert each component's rows from its start_rows position on."""
+    for (table, record, _), component, start in zip(COMPONENTS.values(), components, start_rows):
+        cols = columns(record)
+        conn.executemany(
+            f"INSERT INTO {table} (seq, {', '.join(cols)}) VALUES (?, {', '.join('?' * len(cols))})",
+            ((seq, *encode(row)) for seq, row in enumerate(component.rows[start:], start + 1)))
+
+
+def insert_rates(conn, flat_rows, tou_rows):
+    conn.executemany("INSERT INTO flat_rates (effective_date, class, season, distribution, supply, "
+                     "transmission, total) VALUES (?, ?, ?, ?, ?, ?, ?)", map(encode, flat_rows))
+    conn.executemany("INSERT INTO tou_rates (effective_date, class, season, period, distribution, supply, "
+                     "transmission, total) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", map(encode, tou_rows))
+
+
+def update(as_of_today, path=None, full=False):
+    """Bring the database up to as_of_today. Returns the date rates were
+    recomputed from, or None for a full rebuild."""
+    components = csv_rates.load_components()
+    files = build_cache.file_states(components)
+    seasonal = {cls: csv_rates.is_seasonal(components[1], cls) for cls in csv_rates.CLASSES}
+
+    conn = connect(path)
+    try:
+        state = load_state(conn)
+        since = None if full or not state else build_cache.resume_point(
+            state, files, components, seasonal, as_of_today)
+
+        conn.execute("BEGIN")
+        if since is None:
+            for table, _, _ in COMPONENTS.values():
+                conn.execute(f"DELETE FROM {table}")
+            conn.execute("DELETE FROM flat_rates")
+            conn.execute("DELETE FROM tou_rates")
+            insert_components(conn, components, [0] * len(components))
+            flat_rows, tou_rows = csv_rates.build_tables(as_of_today, components=components)
+        else:
+            insert_components(conn, components, [state["files"][name]["rows"] for name in COMPONENTS])
+            conn.execute("DELETE FROM flat_rates WHERE effective_date >= ?", (since.isoformat(),))
+            conn.execute("DELETE FROM tou_rates WHERE effective_date >= ?", (since.isoformat(),))
+            flat_rows, tou_rows = csv_rates.build_tables(as_of_today, since=since, components=components)
+        insert_rates(conn, flat_rows, tou_rows)
+        for sql in VALID_UNTIL.values():
+            conn.execute(sql, ((since or date.min).isoformat(),))
+
+        conn.execute("DELETE FROM classes")
+        conn.executemany("INSERT INTO classes VALUES (?)", ((cls,) for cls in csv_rates.CLASSES))
+        conn.execute("DELETE FROM periods")
+        conn.executemany("INSERT INTO periods VALUES (?)", ((p,) for p in csv_rates.TOU_PERIODS))
+        conn.execute("DELETE FROM as_of")
+        conn.execute("INSERT INTO as_of VALUES (?)", (as_of_today.isoformat(),))
+        conn.executemany("INSERT OR REPLACE INTO build_state VALUES (?, ?)", [
+            ("version", json.dumps(DB_VERSION)),
+            ("engine", json.dumps(build_cache.engine_hash())),
+            ("as_of", json.dumps(as_of_today.isoformat())),
+            ("seasonal", json.dumps(seasonal)),
+            ("files", json.dumps({name: s for name, (s, _) in files.items()})),
+        ])
+        conn.execute("COMMIT")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return since
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the rate history to SQLite.")
+    parser.add_argument("--db", type=Path, help=f"default: {database_file()}")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--full", action="store_true", help="rebuild every table instead of appending")
+    args = parser.parse_args()
+
+    since = update(args.as_of, args.db, args.full)
+    how = "rebuilt" if since is None else f"updated from {since}"
+    print(f"Wrote {args.db or database_file()} ({how})")
+
+
+if __name__ == "__main__":
+    main()
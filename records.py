@@ -0,0 +1,113 @@
+"""
+records.py — the row types every stage shares, and loaders that parse once.
+
+Component rows and computed rate rows are namedtuples: fixed fields, no
+per-row dict, and still plain tuples, so positional code (row[0], row[3:7])
+keeps working. The loaders read a CSV with csv.reader, map its header to
+the record's fields once, and parse dates and numbers as they build each
+record; nothing downstream parses again.
+
+    riders = records.load_riders("data/riders.csv")
+    riders[0].effective_date, riders[0].rider_22
+
+Published CSV and JSON keep their column names (FLAT_HEADER, TOU_HEADER);
+generate_json formats a rate record into that shape, ISO dates and all, only
+as it serializes it.
+"""
+
+import csv
+from collections import namedtuple
+from datetime import date
+
+
+def parse_date(s):
+    return date.fromisoformat(s.strip())
+
+
+def parse_num(s):
+    return float(s.strip())
+
+
+def parse_int(s):
+    return int(s.strip())
+
+
+def text(s):
+    return s
+
+
+# --- Component rows (data/*.csv) ---
+Rider = namedtuple("Rider", "effective_date rider_1 rider_5 rider_15a rider_10 rider_22")
+DistributionBase = namedtuple("DistributionBase", "effective_date cls season base_rate")
+Transmission = namedtuple("Transmission", "effective_date cls transmission")
+Supply = namedtuple("Supply", "effective_date rate")
+SupplyTou = namedtuple("SupplyTou", "effective_date period rate")
+ScheduleRule = namedtuple("ScheduleRule", "effective_date cls days start_hour end_hour period")
+
+# --- Computed rate rows (build_tables, output/rates*.csv) ---
+FlatRate = namedtuple("FlatRate", "effective_date cls season distribution supply transmission total")
+TouRate = namedtuple("TouRate", "effective_date cls season period distribution supply transmission total")
+
+FLAT_HEADER = ["Effective Date", "Class", "Season", "Distribution Rate", "Supply Rate",
+               "Transmission Rate", "Total Rate"]
+TOU_HEADER = ["Effective Date", "Class", "Season", "Period", "Distribution Rate", "Supply Rate",
+              "Transmission Rate", "Total Rate"]
+
+# record type -> (CSV column, parser) per field, in field order
+COLUMNS = {
+    Rider: [("Effective Date", parse_date), ("Rider 1", parse_num), ("Rider 5", parse_num),
+            ("Rider 15a", parse_num), ("Rider 10 (%)", parse_num), ("Rider 22 (%)", parse_num)],
+    DistributionBase: [("Effective Date", parse_date), ("Class", text), ("Season", text),
+                       ("Base Rate", parse_num)],
+    Transmission: [("Effective Date", parse_date), ("Class", text), ("Transmission", parse_num)],
+    Supply: [("Effective Date", parse_date), ("Rate", parse_num)],
+    SupplyTou: [("Effective Date", parse_date), ("Period", text), ("Rate", parse_num)],
+    ScheduleRule: [("Effective Date", parse_date), ("Class", text), ("Days", text),
+                   ("Start Hour", parse_int), ("End Hour", parse_int), ("Period", text)],
+    FlatRate: list(zip(FLAT_HEADER, [parse_date, text, text] + [parse_num] * 4)),
+    TouRate: list(zip(TOU_HEADER, [parse_date, text, text, text] + [parse_num] * 4)),
+}
+
+
+def read(path, record):
+    """Every row of a CSV as record, parsed once. Blank lines are skipped,
+    as csv.DictReader would."""
+    columns = COLUMNS[record]
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        fields = [(header.index(name), parse) for name, parse in columns]
+        return [record._make([parse(row[i]) for i, parse in fields]) for row in reader if row]
+
+
+def load_riders(path):
+    return read(path, Rider)
+
+
+def load_distribution_base(path):
+    return read(path, DistributionBase)
+
+
+def load_transmission(path):
+    return read(path, Transmission)
+
+
+def load_supply(path):
+    return read(path, Supply)
+
+
+def load_supply_tou(path):
+    return read(path, SupplyTou)
+
+
+def load_tou_schedule(path):
+    return read(path, ScheduleRule)
+
+
+def read_flat(path):
+    return read(path, FlatRate)
+
+
+def read_tou(path):
+    return read(path, TouRate)
+
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+synth_tariffs.py — write large, realistic-looking component files for
+benchmarks.
+
+The real data/*.csv files only cover a couple of years, which hides any
+scaling problem. This writes the same five component files (plus a TOU
+schedule) into a directory of your choice:
+
+    riders.csv             quarterly rider updates
+    distribution_base.csv  a rate case every 2-3 years per class, seasonal
+                           (Summer/Winter) or flat (All) by class
+    transmission.csv       semi-annual per class
+    supply.csv             weekly PTC changes
+    supply_tou.csv         semi-annual per period
+    tou_schedule.csv       one schedule splitting the day across the periods
+    synth.json             the classes and periods used, for the bench runner
+
+Values follow a seeded random walk, so the same arguments always produce
+the same files.
+"""
+
+import argparse
+import csv
+import json
+import random
+from datetime import date, timedelta
+from pathlib import Path
+
+BASE_CLASSES = ["RS", "RH", "RA"]
+BASE_PERIODS = ["Peak", "Off-Peak", "Super Off-Peak"]
+
+
+def class_names(n):
+    return (BASE_CLASSES + [f"C{i:02d}" for i in range(1, n)])[:n]
+
+
+def period_names(n):
+    return (BASE_PERIODS + [f"Period {i}" for i in range(1, n)])[:n]
+
+
+def walk(rnd, value, step, low=0.0):
+    return round(max(low, value + rnd.uniform(-step, step)), 4)
+
+
+def write(path, header, rows):
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f, lineterminator="\n")
+        w.writerow(header)
+        w.writerows(rows)
+
+
+def generate(out_dir, years=20, classes=3, periods=3, end=date(2026, 1, 1), seed=0):
+    """Write the synthetic component files to out_dir and return its metadata."""
+    rnd = random.Random(seed)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    start = date(end.year - years, 1, 1)
+    class_list = class_names(classes)
+    period_list = period_names(periods)
+
+    riders = []
+    r1, r5, r15, r10, r22 = 0.0, 1.5, 0.2, 0.13, 0.0
+    for year in range(start.year, end.year):
+        for month in (1, 4, 7, 10):
+            r5, r15 = walk(rnd, r5, 0.05), walk(rnd, r15, 0.02)
+            r10, r22 = walk(rnd, r10, 0.02, -1.0), walk(rnd, r22, 0.3, -1.0)
+            riders.append([date(year, month, 1), r1, r5, r15, r10, r22])
+    write(out_dir / "riders.csv",
+          ["Effective Date", "Rider 1", "Rider 5", "Rider 15a", "Rider 10 (%)", "Rider 22 (%)"], riders)
+
+    dist = []
+    trans = []
+    for i, cls in enumerate(class_list):
+        seasons = ["All"] if i % 3 == 0 else ["Summer", "Winter"]
+        base = {s: rnd.uniform(3, 9) for s in seasons}
+        year = start.year
+        while year < end.year:
+            for s in seasons:
+                base[s] = walk(rnd, base[s], 0.8, 1.0)
+                dist.append([date(year, 1, 1), cls, s, base[s]])
+            year += rnd.choice((2, 3))
+        t = rnd.uniform(1, 3)
+        for year in range(start.year, end.year):
+            for month in (6, 12):
+                t = walk(rnd, t, 0.2, 0.5)
+                trans.append([date(year, month, 1), cls, t])
+    write(out_dir / "distribution_base.csv", ["Effective Date", "Class", "Season", "Base Rate"], dist)
+    write(out_dir / "transmission.csv", ["Effective Date", "Class", "Transmission"], trans)
+
+    supply = []
+    rate = 8.0
+    day = start
+    while day < end:
+        rate = walk(rnd, rate, 0.3, 2.0)
+        supply.append([day, rate])
+        day += timedelta(weeks=1)
+    write(out_dir / "supply.csv", ["Effective Date", "Rate"], supply)
+
+    supply_tou = []
+    tou = {p: rnd.uniform(3, 30) for p in period_list}
+    for year in range(start.year, end.year):
+        for month in (6, 12):
+            for p in period_list:
+                tou[p] = walk(rnd, tou[p], 1.0, 1.0)
+                supply_tou.append([date(year, month, 1), p, tou[p]])
+    write(out_dir / "supply_tou.csv", ["Effective Date", "Period", "Rate"], supply_tou)
+
+    bounds = [round(24 * i / len(period_list)) for i in range(len(period_list) + 1)]
+    schedule = [[start, "All", "All", bounds[i], bounds[i + 1], p] for i, p in enumerate(period_list)]
+    write(out_dir / "tou_schedule.csv",
+          ["Effective Date", "Class", "Days", "Start Hour", "End Hour", "Period"], schedule)
+
+    meta = {"years": years, "classes": class_list, "periods": period_list, "end": end.isoformat(), "seed": seed}
+    (out_dir / "synth.json").write_text(json.dumps(meta, indent=2))
+    return meta
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic tariff component files.")
+    parser.add_argument("out_dir")
+    parser.add_argument("--years", type=int, default=20)
+    parser.add_argument("--classes", type=int, default=3)
+    parser.add_argument("--periods", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    meta = generate(args.out_dir, args.years, args.classes, args.periods, seed=args.seed)
+    print(f"Wrote {args.out_dir}: {meta['years']} years, {len(meta['classes'])} classes, "
+          f"{len(meta['periods'])} TOU periods")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+tariffs.py — build several utilities' rate tables from one manifest.
+
+tariffs.json lists each tariff set: its data directory (the same five
+component files as data/), its classes, TOU periods and season calendar:
+
+    {"tariffs": [
+        {"name": "dlc", "data": "data",
+         "classes": ["RS", "RH", "RA"],
+         "periods": ["Peak", "Off-Peak", "Super Off-Peak"],
+         "seasons": [["05-01", "Summer"], ["11-01", "Winter"]]}
+    ]}
+
+Outputs are namespaced per tariff: output/NAME/ gets rates.csv,
+rates_tou.csv, rates.json and api/, and docs/NAME/index.html the page
+("output" and "html" in a tariff's entry override these).
+
+Every (tariff, class) pair is its own job in one process pool, and each
+tariff's output stage is queued as soon as its classes are done, so the
+build takes about as long as the largest tariff rather than the sum of
+all of them. csv_rates and the stage modules keep their settings in module
+globals; a worker points them at a tariff (configure()) before each job.
+
+    python3 tariffs.py                    # every tariff in tariffs.json
+    python3 tariffs.py --only dlc --workers 4
+"""
+
+import argparse
+import json
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pathlib import Path
+
+import artifacts
+import csv_rates
+import generate_json
+import html_rates
+
+MANIFEST = "tariffs.json"
+PERIOD_ORDER = ["Off-Peak", "Peak", "Super Off-Peak"]  # output order; other periods follow
+
+_components = {}  # tariff name -> loaded components, per worker process
+
+
+def load_manifest(path=MANIFEST):
+    """Tariff entries from a manifest, with default output paths filled in."""
+    with open(path) as f:
+        tariffs = json.load(f)["tariffs"]
+    for t in tariffs:
+        t.setdefault("output", str(Path("output") / t["name"]))
+        t.setdefault("html", str(Path("docs") / t["name"] / "index.html"))
+    return tariffs
+
+
+def configure(tariff):
+    """Point csv_rates and the page at one tariff set."""
+    csv_rates.DATA = Path(tariff["data"])
+    csv_rates.OUTPUT = Path(tariff["output"])
+    csv_rates.CLASSES = tariff["classes"]
+    csv_rates.TOU_PERIODS = tariff["periods"]
+    order = PERIOD_ORDER + [p for p in tariff["periods"] if p not in PERIOD_ORDER]
+    csv_rates.PERIOD_ORDER = {p: i for i, p in enumerate(order)}
+    csv_rates.SEASONS = sorted((int(md[:2]), int(md[3:]), name) for md, name in tariff["seasons"])
+    html_rates.CLASSES = tariff["classes"]
+
+
+def components(tariff):
+    if tariff["name"] not in _components:
+        _components[tariff["name"]] = csv_rates.load_components()
+    return _components[tariff["name"]]
+
+
+def build_class(tariff, cls, as_of_today):
+    """Pool job: (flat, tou, upcoming flat, upcoming tou) rows for one class."""
+    configure(tariff)
+    return csv_rates.class_tables(components(tariff), cls, as_of_today)
+
+
+def write_tariff(tariff, tables, publish_upcoming=False, compress=True):
+    """Pool job: every output of one tariff from its per-class tables."""
+    configure(tariff)
+    csv_rates.OUTPUT.mkdir(parents=True, exist_ok=True)
+    flat_rows, tou_rows, upcoming_flat, upcoming_tou = ([r for t in tables for r in t[i]] for i in range(4))
+    flat_sorted = csv_rates.sort_flat(flat_rows)
+    tou_sorted = csv_rates.sort_tou(tou_rows)
+    csv_rates.write_output(flat_sorted, tou_sorted)
+
+    upcoming = csv_rates.sort_flat(upcoming_flat), csv_rates.sort_tou(upcoming_tou)
+    rates_json = str(Path(tariff["output"]) / "rates.json")
+    generate_json.write_json(flat_sorted, tou_sorted, output_file=rates_json,
+                             api_dir=str(Path(tariff["output"]) / "api"),
+                             upcoming=upcoming, publish_upcoming=publish_upcoming)
+
+    Path(tariff["html"]).parent.mkdir(parents=True, exist_ok=True)
+    html_rates.write_html(html_rates.group_rates(flat_sorted),
+                          html_rates.group_rates(tou_sorted), tariff["html"])
+    if compress:
+        artifacts.publish([tariff["html"], rates_json], str(Path(tariff["output"]) / "artifacts.json"))
+    return tariff["name"], len(flat_rows), len(tou_rows)
+
+
+def build_all(tariffs, as_of_today, workers=None, publish_upcoming=False, compress=True):
+    """Build every tariff in one process pool; returns (name, flat rows,
+    TOU rows) per tariff."""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        jobs = [(t, [pool.submit(build_class, t, cls, as_of_today) for cls in t["classes"]])
+                for t in tariffs]
+        writes = [pool.submit(write_tariff, t, [job.result() for job in class_jobs],
+                              publish_upcoming, compress)
+                  for t, class_jobs in jobs]
+        return [w.result() for w in writes]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build every tariff set listed in a manifest.")
+    parser.add_argument("--manifest", default=MANIFEST)
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="build just these tariffs")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--upcoming", action="store_true",
+                        help="also publish already-known future rates in the JSON outputs")
+    parser.add_argument("--no-compress", action="store_true", help="skip the .gz/.br variants")
+    args = parser.parse_args()
+
+    tariffs = load_manifest(args.manifest)
+    if args.only:
+        unknown = set(args.only) - {t["name"] for t in tariffs}
+        if unknown:
+            parser.error(f"not in {args.manifest}: {', '.join(sorted(unknown))}")
+        tariffs = [t for t in tariffs if t["name"] in args.only]
+
+    for name, flat, tou in build_all(tariffs, date.today(), args.workers, args.upcoming, not args.no_compress):
+        print(f"{name}: {flat} flat rows, {tou} TOU rows")
+
+
+if __name__ == "__main__":
+    main()
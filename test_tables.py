@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+test_tables.py — the table builders must agree with each other.
+
+build_tables() is the reference: every date of every class priced with
+as-of lookups. The sweep-line builder, the plain (unindexed) as-of path,
+the streaming iter_rows(), the per-class class_tables() and the
+incremental build cache are all optimizations of it and must return the
+same rows. Checked on a small synth_tariffs data set:
+
+    python3 -m unittest test_tables
+"""
+
+import shutil
+import tempfile
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+
+import bench
+import build_cache
+import csv_rates
+import html_rates
+import synth_tariffs
+import tariffs
+
+AS_OF = date(2025, 6, 15)  # the synthetic filings run to the end of 2025
+
+# Globals tariffs.configure() changes, restored after the tests
+SETTINGS = {
+    csv_rates: ("DATA", "OUTPUT", "CLASSES", "TOU_PERIODS", "PERIOD_ORDER", "SEASONS"),
+    html_rates: ("CLASSES",),
+}
+
+
+def as_lists(components):
+    """The components as plain row lists, so every lookup scans."""
+    return tuple(list(c) for c in components)
+
+
+class TablesTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.saved = {(m, name): getattr(m, name) for m, names in SETTINGS.items() for name in names}
+        cls.tmp = Path(tempfile.mkdtemp())
+        meta = synth_tariffs.generate(cls.tmp / "data", years=5, classes=4, periods=4, seed=7)
+        tariffs.configure(bench.tariff(cls.tmp / "data", cls.tmp / "output", meta))
+        cls.components = csv_rates.load_components()
+        cls.flat, cls.tou = csv_rates.build_tables(AS_OF, components=cls.components)
+
+    @classmethod
+    def tearDownClass(cls):
+        for (module, name), value in cls.saved.items():
+            setattr(module, name, value)
+        shutil.rmtree(cls.tmp)
+
+    def assertSameRows(self, got, expected):
+        self.assertEqual(csv_rates.sort_flat(got[0]), csv_rates.sort_flat(expected[0]))
+        self.assertEqual(csv_rates.sort_tou(got[1]), csv_rates.sort_tou(expected[1]))
+
+    def test_data_set_has_rows(self):
+        self.assertGreater(len(self.flat), 100)
+        self.assertGreater(len(self.tou), 100)
+
+    def test_sweep_tables(self):
+        self.assertSameRows(csv_rates.sweep_tables(AS_OF, components=self.components), (self.flat, self.tou))
+
+    def test_plain_as_of(self):
+        self.assertSameRows(csv_rates.build_tables(AS_OF, components=as_lists(self.components)),
+                            (self.flat, self.tou))
+
+    def test_since(self):
+        since = date(2024, 3, 1)
+        flat, tou = csv_rates.build_tables(AS_OF, since=since, components=self.components)
+        self.assertSameRows((flat, tou), ([r for r in self.flat if r[0] >= since],
+                                          [r for r in self.tou if r[0] >= since]))
+
+    def test_iter_rows(self):
+        rows = list(csv_rates.iter_rows(self.components, end=AS_OF))
+        flat = [f for f, _ in rows if f is not None]
+        tou = [r for _, t in rows for r in t]
+        # Already in output order, no sort needed
+        self.assertEqual(flat, csv_rates.sort_flat(self.flat))
+        self.assertEqual(tou, csv_rates.sort_tou(self.tou))
+
+    def test_iter_rows_filtered(self):
+        start, classes, periods = date(2023, 2, 1), csv_rates.CLASSES[1:3], csv_rates.TOU_PERIODS[::2]
+        rows = list(csv_rates.iter_rows(self.components, classes, start, AS_OF, periods))
+        self.assertEqual([f for f, _ in rows if f is not None],
+                         [r for r in csv_rates.sort_flat(self.flat) if r[0] >= start and r[1] in classes])
+        self.assertEqual([r for _, t in rows for r in t],
+                         [r for r in csv_rates.sort_tou(self.tou)
+                          if r[0] >= start and r[1] in classes and r[3] in periods])
+
+    def test_class_tables(self):
+        horizon = csv_rates.upcoming_horizon(AS_OF, self.components)
+        upcoming = csv_rates.upcoming_tables(AS_OF, self.components)
+        for cls in csv_rates.CLASSES:
+            flat, tou, upcoming_flat, upcoming_tou = csv_rates.class_tables(self.components, cls, AS_OF, horizon)
+            self.assertSameRows((flat, tou), ([r for r in self.flat if r[1] == cls],
+                                              [r for r in self.tou if r[1] == cls]))
+            self.assertSameRows((upcoming_flat, upcoming_tou), ([r for r in upcoming[0] if r[1] == cls],
+                                                                [r for r in upcoming[1] if r[1] == cls]))
+
+
+class IncrementalTest(unittest.TestCase):
+    """build_cache.incremental_tables() against a full build."""
+
+    def setUp(self):
+        self.saved = {(m, name): getattr(m, name) for m, names in SETTINGS.items() for name in names}
+        self.tmp = Path(tempfile.mkdtemp())
+        meta = synth_tariffs.generate(self.tmp / "data", years=4, classes=3, periods=3, seed=11)
+        tariffs.configure(bench.tariff(self.tmp / "data", self.tmp / "output", meta))
+        self.cache = self.tmp / "cache.json"
+
+    def tearDown(self):
+        for (module, name), value in self.saved.items():
+            setattr(module, name, value)
+        shutil.rmtree(self.tmp)
+
+    def assertMatchesFull(self, as_of_today):
+        flat, tou, since = build_cache.incremental_tables(as_of_today, self.cache)
+        full = csv_rates.build_tables(as_of_today)
+        self.assertEqual(csv_rates.sort_flat(flat), csv_rates.sort_flat(full[0]))
+        self.assertEqual(csv_rates.sort_tou(tou), csv_rates.sort_tou(full[1]))
+        return since
+
+    def test_append(self):
+        self.assertIsNone(self.assertMatchesFull(AS_OF))  # no cache yet
+        with open(csv_rates.DATA / "supply.csv", "a") as f:
+            f.write("2025-02-03,9.8765\n")
+        with open(csv_rates.DATA / "distribution_base.csv", "a") as f:
+            f.write(f"2025-04-01,{csv_rates.CLASSES[0]},All,4.321\n")
+        self.assertEqual(self.assertMatchesFull(AS_OF), date(2025, 2, 3))
+
+    def test_as_of_moves(self):
+        self.assertMatchesFull(AS_OF)
+        later = AS_OF + timedelta(days=120)
+        self.assertEqual(self.assertMatchesFull(later), AS_OF + timedelta(days=1))
+        self.assertIsNone(self.assertMatchesFull(AS_OF))  # moving back rebuilds
+
+    def test_edit_rebuilds(self):
+        self.assertMatchesFull(AS_OF)
+        path = csv_rates.DATA / "transmission.csv"
+        lines = path.read_text().splitlines()
+        lines[1] = lines[1].rsplit(",", 1)[0] + ",9.9"
+        path.write_text("\n".join(lines) + "\n")
+        self.assertIsNone(self.assertMatchesFull(AS_OF))
+
+
+if __name__ == "__main__":
+    unittest.main()
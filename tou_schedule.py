@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+tou_schedule.py — which hours belong to which TOU period.
+
+supply_tou.csv prices the Peak / Off-Peak / Super Off-Peak periods; this
+file says when they apply:
+
+    data/tou_schedule.csv   Effective Date, Class, Days, Start Hour, End Hour, Period
+
+Like the other component files it only records a schedule when it changes:
+all rows sharing an Effective Date (for a class, or "All" classes) form one
+schedule version. Hours are local clock hours, [Start Hour, End Hour), and
+a range may wrap past midnight (e.g. 23 to 6). Days is one of All, Weekday,
+Weekend or Holiday; the most specific rule covering an hour wins, and
+holidays (NERC holidays, see nerc_holidays) fall back to the weekend rules.
+
+For pricing, each (year, class) is compiled once into an hour-of-year table:
+a bytes object of 8760 or 8784 period codes (an index into
+csv_rates.TOU_PERIODS as it was when the TouSchedule was built, NO_PERIOD
+where no schedule is in effect). Any
+timestamp then maps to its period with a single index.
+"""
+
+from bisect import bisect_right
+from datetime import date, timedelta
+
+import csv_rates
+import records
+
+SCHEDULE_CSV = "tou_schedule.csv"  # in csv_rates.DATA
+
+NO_PERIOD = 255
+
+# Rules consulted for each kind of day, most specific first.
+DAY_RULES = {
+    "Weekday": ["Weekday", "All"],
+    "Weekend": ["Weekend", "All"],
+    "Holiday": ["Holiday", "Weekend", "All"],
+}
+
+
+def nth_weekday(year, month, weekday, n):
+    """n-th (1-based, or -1 for last) given weekday of a month."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def nerc_holidays(year):
+    """The six NERC off-peak holidays; a Sunday holiday moves to Monday."""
+    days = {
+        date(year, 1, 1),
+        nth_weekday(year, 5, 0, -1),   # Memorial Day
+        date(year, 7, 4),
+        nth_weekday(year, 9, 0, 1),    # Labor Day
+        nth_weekday(year, 11, 3, 4),   # Thanksgiving
+        date(year, 12, 25),
+    }
+    return {d + timedelta(days=1) if d.weekday() == 6 else d for d in days}
+
+
+def load_schedule(path=None):
+    """The schedule rows; path defaults to the configured data directory's."""
+    return records.load_tou_schedule(path or csv_rates.DATA / SCHEDULE_CSV)
+
+
+def day_profiles(rules, period_codes):
+    """{kind of day: 24 period codes} for one schedule version."""
+    hours_by_days = {}
+    for r in rules:
+        codes = hours_by_days.setdefault(r.days, [None] * 24)
+        start, end = r.start_hour, r.end_hour
+        hours = range(start, end) if start < end else [*range(start, 24), *range(0, end)]
+        for h in hours:
+            codes[h] = period_codes[r.period]
+
+    profiles = {}
+    for kind, order in DAY_RULES.items():
+        profile = bytearray([NO_PERIOD] * 24)
+        for h in range(24):
+            for days in order:
+                code = hours_by_days.get(days, [None] * 24)[h]
+                if code is not None:
+                    profile[h] = code
+                    break
+        profiles[kind] = bytes(profile)
+    return profiles
+
+
+class TouSchedule:
+    def __init__(self, rows):
+        self.periods = list(csv_rates.TOU_PERIODS)
+        period_codes = {p: i for i, p in enumerate(self.periods)}
+        versions = {}
+        for r in rows:
+            versions.setdefault((r.cls, r.effective_date), []).append(r)
+        self.versions = {}  # class -> (sorted effective dates, [profiles])
+        for (cls, eff) in sorted(versions, key=lambda k: k[1]):
+            dates, profiles = self.versions.setdefault(cls, ([], []))
+            dates.append(eff)
+            profiles.append(day_profiles(versions[(cls, eff)], period_codes))
+        self._tables = {}
+
+    @classmethod
+    def load(cls, path=None):
+        return cls(load_schedule(path))
+
+    def _profiles_on(self, cls, day):
+        """Day profiles in effect for a class, falling back to "All" classes."""
+        for key in (cls, "All"):
+            series = self.versions.get(key)
+            if series is None:
+                continue
+            i = bisect_right(series[0], day)
+            if i:
+                return series[1][i - 1]
+        return None
+
+    def hour_table(self, year, cls):
+        """Period code for every hour of the year (8760 or 8784 entries)."""
+        table = self._tables.get((year, cls))
+        if table is None:
+            holidays = nerc_holidays(year)
+            day = date(year, 1, 1)
+            out = bytearray()
+            while day.year == year:
+                profiles = self._profiles_on(cls, day)
+                if profiles is None:
+                    out += bytes([NO_PERIOD] * 24)
+                else:
+                    kind = "Holiday" if day in holidays else "Weekend" if day.weekday() >= 5 else "Weekday"
+                    out += profiles[kind]
+                day += timedelta(days=1)
+            table = self._tables[(year, cls)] = bytes(out)
+        return table
+
+    def period_code(self, day, hour, cls):
+        return self.hour_table(day.year, cls)[(day.timetuple().tm_yday - 1) * 24 + hour]
+
+    def period_at(self, day, hour, cls):
+        """Period name for an hour, or None if no schedule was in effect."""
+        code = self.period_code(day, hour, cls)
+        return None if code == NO_PERIOD else self.periods[code]
+
+    def period_codes(self, year, cls, hours_of_year):
+        """Gather the codes for many hour-of-year indexes in one pass."""
+        return bytes(map(self.hour_table(year, cls).__getitem__, hours_of_year))
+
+    def period_for_hour(self, cls):
+        """A period_for_hour(day, hour) callable for bills.price_usage."""
+        return lambda day, hour: self.period_at(day, hour, cls)
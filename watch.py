@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+watch.py — keep the build warm and rebuild only what an edit touches.
+
+Run as `python3 build.py --watch`. The indexed component files, each
+class's rows and each class's rendered piece of every output (its CSV rows,
+its rates.json entry, its page section and chart payload) stay in memory
+between rebuilds. data/ and the stage modules are polled; a burst of saves
+is debounced into one rebuild, and then:
+
+  * a changed component file is the only one re-parsed. Distribution base
+    and transmission rows are per class, so only the classes whose rows
+    actually changed are re-swept (csv_rates.sweep_class); riders, supply
+    and TOU supply apply to every class.
+  * a class is re-swept once, through the upcoming-rates horizon, and split
+    at today into the published and upcoming rows.
+  * only the classes whose rows changed are re-rendered; every output file
+    is then reassembled from the cached pieces, and only those classes'
+    API history shards are re-encoded.
+  * an edit to html_rates.py or generate_json.py reloads that module and
+    re-renders only its stage; an edit to csv_rates.py or records.py
+    reloads it and rebuilds everything. A reload keeps the module's
+    configured settings (SETTINGS), so a tariff set up with
+    tariffs.configure() stays in effect.
+
+The .gz/.br variants are not written while watching (run a normal build
+before publishing). A rebuild that fails for any reason — a half-saved
+row, a syntax error in a reloaded module — keeps the previous state and
+outputs, and is retried with the next change.
+"""
+
+import importlib
+import time
+from datetime import date
+from pathlib import Path
+
+import artifacts
+import build
+import csv_rates
+import generate_json
+import html_rates
+import records
+
+POLL_INTERVAL = 0.025  # seconds between polls
+DEBOUNCE = 0.05  # quiet time that ends a burst of changes
+
+# File name -> (position in load_components(), loader name, index keys)
+COMPONENTS = {
+    "riders.csv": (0, "load_riders", ()),
+    "distribution_base.csv": (1, "load_distribution_base", ("cls", "season")),
+    "transmission.csv": (2, "load_transmission", ("cls",)),
+    "supply.csv": (3, "load_supply", ()),
+    "supply_tou.csv": (4, "load_supply_tou", ("period",)),
+}
+
+# Module file -> the output stages that only it affects
+MODULES = {
+    "html_rates.py": (html_rates, {"html"}),
+    "generate_json.py": (generate_json, {"json"}),
+    "artifacts.py": (artifacts, {"json", "html"}),
+}
+
+# Modules every stage depends on; an edit to one rebuilds everything
+ENGINE = ["records.py", "csv_rates.py"]
+
+# Module globals a caller may have configured (see tariffs.configure());
+# reload() carries them over the re-run of the module's top level.
+SETTINGS = {
+    "csv_rates": ("DATA", "OUTPUT", "CLASSES", "TOU_PERIODS", "PERIOD_ORDER", "SEASONS"),
+    "html_rates": ("CLASSES", "OUTPUT_HTML"),
+    "generate_json": ("OUTPUT_DIR", "RATES_CSV", "RATES_TOU_CSV", "RATES_JSON", "API_DIR"),
+}
+
+
+def signature():
+    """{path: (mtime, size)} for every watched file."""
+    paths = [csv_rates.DATA / name for name in COMPONENTS]
+    paths += [Path(name) for name in list(MODULES) + ENGINE]
+    sig = {}
+    for path in paths:
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        sig[str(path)] = (st.st_mtime_ns, st.st_size)
+    return sig
+
+
+def reload(module):
+    """importlib.reload(), keeping the module's configured SETTINGS."""
+    kept = {name: getattr(module, name) for name in SETTINGS.get(module.__name__, ())}
+    importlib.reload(module)
+    for name, value in kept.items():
+        setattr(module, name, value)
+
+
+def class_rows(index, cls):
+    return [r for r in index if r.cls == cls]
+
+
+def sweep(components, cls, today, horizon):
+    """One class's (flat, tou, upcoming flat, upcoming tou) rows, each sorted
+    as the outputs list them."""
+    flat, tou, upcoming_flat, upcoming_tou = csv_rates.class_tables(components, cls, today, horizon)
+    return (csv_rates.sort_flat(flat), csv_rates.sort_tou(tou),
+            csv_rates.sort_flat(upcoming_flat), csv_rates.sort_tou(upcoming_tou))
+
+
+def reparse(components, name):
+    """Reload one component file into components; returns the classes it
+    affects."""
+    position, loader, keys = COMPONENTS[name]
+    old = components[position]
+    new = csv_rates.RateIndex(getattr(csv_rates, loader)(), *keys)
+    components[position] = new
+    if "cls" not in keys:
+        return set(csv_rates.CLASSES)
+    return {cls for cls in csv_rates.CLASSES if class_rows(old, cls) != class_rows(new, cls)}
+
+
+class Watcher:
+    def __init__(self, publish_upcoming=False, compress=False):
+        self.publish_upcoming = publish_upcoming
+        self.compress = compress
+        self.components = list(csv_rates.load_components())
+        self.today = date.today()
+        self.horizon = csv_rates.upcoming_horizon(self.today, self.components)
+        # class -> sweep() rows
+        self.rows = {cls: sweep(self.components, cls, self.today, self.horizon) for cls in csv_rates.CLASSES}
+        self.pieces = {stage: {} for stage in build.STAGES}  # stage -> class -> rendered piece
+        self.dirty = set(build.STAGES)  # stages whose files are out of date
+        self.write()
+
+    def render(self, stage, cls):
+        """One class's piece of a stage's output."""
+        flat, tou, upcoming_flat, upcoming_tou = self.rows[cls]
+        if stage == "csv":
+            return csv_rates.csv_chunk(flat), csv_rates.csv_chunk(tou)
+        if stage == "json":
+            data = generate_json.build_data(flat, tou, (upcoming_flat, upcoming_tou), self.publish_upcoming)
+            return data.get(cls), generate_json.encode_classes(data).get(cls)
+        return html_rates.render_class(cls, html_rates.group_rates(flat).get(cls, []),
+                                       html_rates.group_rates(tou).get(cls, []))
+
+    def write(self):
+        """Rewrite every dirty stage from the cached pieces, rendering the
+        classes that have none."""
+        stages = [s for s in build.STAGES if s in self.dirty]
+        for stage in stages:
+            pieces = self.pieces[stage]
+            fresh = {cls for cls in csv_rates.CLASSES if cls not in pieces}
+            for cls in fresh:
+                pieces[cls] = self.render(stage, cls)
+            classes = sorted(csv_rates.CLASSES)  # output order: class ascending
+
+            if stage == "csv":
+                csv_rates.OUTPUT.mkdir(exist_ok=True)
+                csv_rates.write_chunks(csv_rates.OUTPUT / "rates.csv", csv_rates.FLAT_HEADER,
+                                       [pieces[cls][0] for cls in classes])
+                csv_rates.write_chunks(csv_rates.OUTPUT / "rates_tou.csv", csv_rates.TOU_HEADER,
+                                       [pieces[cls][1] for cls in classes])
+            elif stage == "json":
+                data = {cls: pieces[cls][0] for cls in classes if pieces[cls][0] is not None}
+                generate_json.write_document({cls: pieces[cls][1] for cls in data})
+                generate_json.write_api(data, generate_json.API_DIR, classes=fresh)
+            else:
+                html_rates.write_page(html_rates.render_page(pieces))
+            self.dirty.discard(stage)
+
+        if self.compress and {"json", "html"} & set(stages):
+            artifacts.publish()
+        return stages
+
+    def apply(self, changed):
+        """Rebuild for a set of changed file names; returns the stages
+        written. Nothing is kept until every file has parsed and every
+        class has been swept, so a failure leaves the previous state."""
+        components = list(self.components)
+        classes = set()
+        reloaded = set()
+        if changed & set(ENGINE):
+            if "records.py" in changed:
+                reload(records)
+            reload(csv_rates)  # after records: it binds names from it
+            components = list(csv_rates.load_components())
+            classes = set(csv_rates.CLASSES)
+            reloaded = set(build.STAGES)
+        else:
+            for name in changed & COMPONENTS.keys():
+                classes |= reparse(components, name)
+            for name in changed & MODULES.keys():
+                module, affects = MODULES[name]
+                reload(module)
+                reloaded |= affects
+
+        today = date.today()
+        horizon = csv_rates.upcoming_horizon(today, components)
+        if (today, horizon) != (self.today, self.horizon):
+            classes = set(csv_rates.CLASSES)
+        rows = {cls: sweep(components, cls, today, horizon) for cls in classes}
+        swept = {cls for cls, r in rows.items() if self.rows.get(cls) != r}
+        if today != self.today:
+            swept = set(csv_rates.CLASSES)  # the current rates move with the date
+
+        self.components, self.today, self.horizon = components, today, horizon
+        self.rows.update(rows)
+        for stage in reloaded:
+            self.pieces[stage].clear()
+        for pieces in self.pieces.values():
+            for cls in swept:
+                pieces.pop(cls, None)
+        self.dirty |= reloaded
+        if swept:
+            self.dirty |= set(build.STAGES)
+        return set(self.write())
+
+    def run(self, poll=POLL_INTERVAL, debounce=DEBOUNCE):
+        print(f"Watching {csv_rates.DATA} and the stage modules (Ctrl-C to stop)")
+        sig = signature()
+        pending = set()  # changes of a failed rebuild, retried with the next one
+        while True:
+            time.sleep(poll)
+            new = signature()
+            if new == sig:
+                continue
+            while True:  # wait for the burst to settle
+                time.sleep(debounce)
+                latest = signature()
+                if latest == new:
+                    break
+                new = latest
+            changed = {Path(p).name for p in sig.keys() | new.keys() if sig.get(p) != new.get(p)} | pending
+            sig = new
+
+            start = time.perf_counter()
+            try:
+                stages = self.apply(changed)
+            except Exception as e:
+                pending = changed
+                print(f"Rebuild failed, keeping previous outputs: {e!r}")
+                continue
+            pending = set()
+            elapsed = (time.perf_counter() - start) * 1000
+            ran = ", ".join(s for s in build.STAGES if s in stages) or "nothing"
+            print(f"{', '.join(sorted(changed))} changed: rebuilt {ran} in {elapsed:.0f} ms")